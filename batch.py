@@ -0,0 +1,93 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.label_batch import CONVERT_FORMATS, find_label_files, process_label_file, read_classes
+
+# Headless batch processing of the label files under one or more directories, without Qt:
+#     python batch.py matches/ --validate
+#     python batch.py matches/ --frames --normalize --convert jsonl --output-dir export/ --jobs 8
+# Label files are found next to their videos (<video name>.csv) or on their own.
+# Exits with 1 when any file has errors.
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+def parse_arguments(argv):
+
+	parser = argparse.ArgumentParser(description="Validate and convert label files in parallel, without the GUI.")
+	parser.add_argument("paths", nargs="+", help="directories to search for label files, or label files")
+	parser.add_argument("--validate", action="store_true", help="check the columns and values of each file")
+	parser.add_argument("--classes", action="store_true", help="also report events and teams missing from config/")
+	parser.add_argument("--frames", action="store_true", help="recompute frame from video_ms with the video's frame rate")
+	parser.add_argument("--normalize", action="store_true", help="recompute minute and second from video_ms")
+	parser.add_argument("--convert", action="append", default=[], choices=sorted(CONVERT_FORMATS), help="also write the labels in this format (repeatable)")
+	parser.add_argument("--output-dir", help="directory for converted files, next to the labels by default")
+	parser.add_argument("--dry-run", action="store_true", help="report changes without writing any file")
+	parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="worker processes (default: number of cores)")
+	parser.add_argument("--report", help="write the per-file results to this JSON file")
+	arguments = parser.parse_args(argv)
+	if not (arguments.validate or arguments.frames or arguments.normalize or arguments.convert):
+		arguments.validate = True
+	return arguments
+
+def make_tasks(arguments):
+
+	classes = None
+	if arguments.classes:
+		classes = (read_classes(os.path.join(ROOT, "config", "event_classes.txt")), read_classes(os.path.join(ROOT, "config", "team_classes.txt")))
+	return [{
+		"label": label,
+		"video": video,
+		"root": root,
+		"validate": arguments.validate or arguments.classes,
+		"classes": classes,
+		"frames": arguments.frames,
+		"normalize": arguments.normalize,
+		"convert": arguments.convert,
+		"output_dir": arguments.output_dir,
+		"dry_run": arguments.dry_run,
+	} for label, video, root in find_label_files(arguments.paths)]
+
+def print_result(result):
+
+	status = "ERROR" if result["errors"] else "ok"
+	changes = ", ".join(f"{name} {count}" for name, count in result["changed"].items())
+	print(f"{status:5} {result['label']} ({result['events']} events{', changed: ' + changes if changes else ''})")
+	for message in result["errors"]:
+		print(f"      error: {message}")
+	for message in result["warnings"]:
+		print(f"      warning: {message}")
+
+def run(arguments):
+
+	tasks = make_tasks(arguments)
+	if not tasks:
+		print("No label files found")
+		return []
+	start = time.perf_counter()
+	jobs = max(1, min(arguments.jobs, len(tasks)))
+	if jobs == 1:
+		results = [process_label_file(task) for task in tasks]
+	else:
+		# Several small files per round trip to the workers
+		chunksize = max(1, len(tasks) // (jobs * 8))
+		with ProcessPoolExecutor(max_workers=jobs) as executor:
+			results = list(executor.map(process_label_file, tasks, chunksize=chunksize))
+	for result in results:
+		print_result(result)
+	failed = sum(1 for result in results if result["errors"])
+	events = sum(result["events"] for result in results)
+	print(f"{len(results)} files, {events} events, {failed} with errors, {time.perf_counter() - start:.2f} s with {jobs} processes")
+	return results
+
+if __name__ == "__main__":
+
+	arguments = parse_arguments(sys.argv[1:])
+	results = run(arguments)
+	if arguments.report:
+		with open(arguments.report, 'w') as file:
+			json.dump(results, file, indent=1)
+	sys.exit(1 if any(result["errors"] for result in results) else 0)
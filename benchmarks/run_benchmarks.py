@@ -0,0 +1,349 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Headless benchmarks of the annotation core and the GUI paths that touch every event.
+# Run from anywhere, without a display:
+#     python benchmarks/run_benchmarks.py --scales 1000,10000,100000,1000000 --output results.json
+#     python benchmarks/run_benchmarks.py --compare old.json new.json
+# Label files and test videos are generated into a temporary directory (or --workdir).
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+import pandas as pd
+import cv2
+
+from utils.event_class import Event
+from utils.list_management import ListManager
+
+DEFAULT_SCALES = [1000, 10000, 100000, 1000000]
+# (width, height) of the generated test videos
+DEFAULT_VIDEOS = [(640, 360), (1920, 1080)]
+FPS = 25
+VIDEO_FRAMES = 250
+MATCH_MS = 90 * 60 * 1000
+
+def read_config(name):
+	with open(os.path.join(ROOT, "config", name)) as file:
+		return [line.strip() for line in file if line.strip()]
+
+def write_synthetic_csv(path, count, seed=0):
+	# Label csv with `count` events spread over a match, with the classes of the configuration
+	rng = np.random.default_rng(seed)
+	events = read_config("event_classes.txt")
+	teams = read_config("team_classes.txt")
+	video_ms = np.sort(rng.integers(0, MATCH_MS, count))
+	pd.DataFrame({
+		"frame": video_ms * FPS // 1000,
+		"team": np.array(teams)[rng.integers(0, len(teams), count)],
+		"event": np.array(events)[rng.integers(0, len(events), count)],
+		"minute": video_ms // 60000,
+		"second": (video_ms % 60000) / 1000.0,
+		"x": rng.integers(0, 1920, count),
+		"y": rng.integers(0, 1080, count),
+		"video_ms": video_ms,
+	}).to_csv(path, index=False)
+
+def write_synthetic_video(path, width, height, frames=VIDEO_FRAMES):
+	# Moving gradient with the frame number drawn in, so that frames differ
+	writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), FPS, (width, height))
+	if not writer.isOpened():
+		raise RuntimeError(f"Could not write test video {path}")
+	base = np.add.outer(np.arange(height) * 255 // max(height - 1, 1), np.arange(width) * 255 // max(width - 1, 1)) // 2
+	for index in range(frames):
+		frame = np.empty((height, width, 3), dtype=np.uint8)
+		frame[..., 0] = (base + index * 3) % 256
+		frame[..., 1] = base
+		frame[..., 2] = 255 - base
+		cv2.putText(frame, str(index), (width // 20, height // 4), cv2.FONT_HERSHEY_SIMPLEX, height / 200, (255, 255, 255), 2)
+		writer.write(frame)
+	writer.release()
+
+def measure(function, repeat, setup=None):
+	# Wall times in ms of `repeat` runs, setup() runs untimed before each and its result is passed on
+	times = list()
+	for _ in range(repeat):
+		state = setup() if setup is not None else None
+		start = time.perf_counter()
+		function(state)
+		times.append((time.perf_counter() - start) * 1000.0)
+	return times
+
+class Benchmarks:
+
+	def __init__(self, workdir, repeat):
+
+		self.workdir = workdir
+		self.repeat = repeat
+		self.results = list()
+		self.application = None
+		self.window = None
+
+	def record(self, name, scale, times, per=1):
+		# per: operations per run, the stored times are per operation
+		times = [value / per for value in times]
+		result = {
+			"name": name,
+			"scale": scale,
+			"unit": "ms",
+			"min": min(times),
+			"median": statistics.median(times),
+			"max": max(times),
+			"runs": len(times),
+			"operations_per_run": per,
+		}
+		self.results.append(result)
+		print(f"{name:<50} {str(scale):>12} {result['median']:>12.4f} ms (min {result['min']:.4f})", flush=True)
+
+	def label_path(self, scale):
+		# One directory per scale, the csv is named after the video as the GUI expects
+		directory = os.path.join(self.workdir, f"events_{scale}")
+		os.makedirs(directory, exist_ok=True)
+		path = os.path.join(directory, "match.csv")
+		if not os.path.isfile(path):
+			write_synthetic_csv(path, scale)
+		return path
+
+	def loaded_manager(self, path):
+
+		list_manager = ListManager()
+		list_manager.create_list_from_csv(path)
+		return list_manager
+
+	def run_core(self, scale):
+
+		path = self.label_path(scale)
+		list_manager = self.loaded_manager(path)
+		rng = np.random.default_rng(1)
+		operations = 200
+
+		self.record("ListManager.read_csv", scale, measure(lambda state: ListManager().read_csv(path), self.repeat))
+		self.record("ListManager.create_list_from_csv", scale, measure(lambda state: self.loaded_manager(path), self.repeat))
+		self.record("ListManager.sort_list", scale, measure(lambda state: list_manager.sort_list(), self.repeat))
+
+		new_events = [
+			Event(int(position) * FPS // 1000, "home", "short_pass", 0, 0.0, 10, 20, int(position))
+			for position in rng.integers(0, MATCH_MS, operations)
+		]
+
+		def add_events(state):
+			for event in new_events:
+				list_manager.add_event(Event(event.frame, event.team, event.event, event.minute, event.second, event.x_coord, event.y_coord, event.position))
+		self.record("ListManager.add_event", scale, measure(add_events, self.repeat), per=operations)
+
+		def pick_ids():
+			indices = rng.choice(len(list_manager.events), operations, replace=False)
+			return [list_manager.events[int(index)].event_id for index in indices]
+
+		def delete_events(event_ids):
+			for event_id in event_ids:
+				list_manager.delete_event(event_id)
+		self.record("ListManager.delete_event", scale, measure(delete_events, self.repeat, setup=pick_ids), per=operations)
+
+		# Appending the pending edits to the journal, then the full csv rewrite
+		def add_pending():
+			list_manager.pending_records.clear()
+			for event in new_events[:10]:
+				list_manager.add_event(Event(event.frame, event.team, event.event, event.minute, event.second, event.x_coord, event.y_coord, event.position))
+		self.record("ListManager.save_file", scale, measure(lambda state: list_manager.save_file(path, 1), self.repeat, setup=add_pending))
+		self.record("ListManager.compact_file", scale, measure(lambda state: list_manager.compact_file(path, 1), self.repeat))
+
+		# Columnar exports and reading them back, when pyarrow is installed
+		if pyarrow_available():
+			for extension in (".parquet", ".arrow"):
+				columnar_path = os.path.join(self.workdir, f"labels_{scale}{extension}")
+				self.record(f"ListManager.export_columnar ({extension})", scale, measure(lambda state: list_manager.export_columnar(columnar_path), self.repeat))
+				self.record(f"ListManager.read_csv ({extension})", scale, measure(lambda state: ListManager().read_csv(columnar_path), self.repeat))
+
+		rows = list(zip(rng.integers(0, MATCH_MS, scale).tolist(), rng.integers(0, 1920, scale).tolist()))
+
+		def construct(state):
+			return [Event(position // 40, "home", "short_pass", position // 60000, (position % 60000) / 1000.0, x, x // 2, position) for position, x in rows]
+		self.record("Event()", scale, measure(construct, self.repeat), per=scale)
+		self.record("Event.to_text", scale, measure(lambda events: [event.to_text() for event in events], self.repeat, setup=lambda: construct(None)), per=scale)
+
+	def open_window(self):
+
+		if self.window is not None:
+			return self.window
+		from PyQt5.QtWidgets import QApplication
+		# The configuration is read relative to the working directory
+		os.chdir(ROOT)
+		self.application = QApplication.instance() or QApplication(sys.argv[:1])
+		from interface.main_window import MainWindow
+		self.window = MainWindow()
+		self.process_events()
+		return self.window
+
+	def process_events(self):
+
+		self.application.processEvents()
+
+	def open_video(self, video_path):
+		window = self.open_window()
+		window.media_player.open_video(video_path)
+		self.process_events()
+
+	def run_display_list(self, scale):
+
+		path = self.label_path(scale)
+		window = self.open_window()
+		window.list_manager.create_list_from_csv(path)
+		self.process_events()
+
+		def display(state):
+			window.list_display.display_list()
+			self.process_events()
+		self.record("ListDisplay.display_list", scale, measure(display, self.repeat))
+
+	def video_path(self, width, height):
+
+		directory = os.path.join(self.workdir, f"video_{width}x{height}")
+		os.makedirs(directory, exist_ok=True)
+		path = os.path.join(directory, "match.mp4")
+		if not os.path.isfile(path):
+			write_synthetic_video(path, width, height)
+			write_synthetic_csv(os.path.join(directory, "match.csv"), 1000)
+		return path
+
+	def run_overlay(self, width, height):
+
+		window = self.open_window()
+		self.open_video(self.video_path(width, height))
+		media_player = window.media_player
+		scale = f"{width}x{height}"
+		rng = np.random.default_rng(2)
+		duration_ms = VIDEO_FRAMES * 1000 // FPS
+
+		# Frame already in the decoder cache: only the painting on the GUI thread
+		position = duration_ms // 2
+		media_player.decoder.frame_at(media_player.decoder.frame_index(position))
+		self.record(
+			"MediaPlayer.show_painted_frame_overlay",
+			scale,
+			measure(lambda state: media_player.show_painted_frame_overlay(position, width // 2, height // 2), self.repeat * 4)
+		)
+
+		# Frame not cached: time until the prefetch thread has decoded it and the overlay is painted
+		def clear_cache():
+			with media_player.decoder.cache_lock:
+				media_player.decoder.cache.clear()
+				media_player.decoder.cached_bytes = 0
+			return int(rng.integers(0, duration_ms))
+
+		def cold(position):
+			media_player.show_painted_frame_overlay(position, width // 2, height // 2)
+			deadline = time.perf_counter() + 10.0
+			while media_player.pending_overlay is not None and time.perf_counter() < deadline:
+				self.process_events()
+				time.sleep(0.0005)
+		self.record("MediaPlayer.show_painted_frame_overlay (uncached)", scale, measure(cold, self.repeat, setup=clear_cache))
+		media_player.hide_frame_overlay()
+
+	def close(self):
+
+		if self.window is not None:
+			self.window.close()
+			self.process_events()
+
+def pyarrow_available():
+
+	try:
+		import pyarrow
+	except ImportError:
+		return False
+	return True
+
+def git_revision():
+
+	try:
+		return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL).decode().strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+def compare(old_path, new_path, threshold):
+	# Prints the median ratio new/old of every benchmark present in both files
+	with open(old_path) as file:
+		old = {(result["name"], str(result["scale"])): result for result in json.load(file)["results"]}
+	with open(new_path) as file:
+		new = json.load(file)["results"]
+	regressions = 0
+	for result in new:
+		previous = old.get((result["name"], str(result["scale"])))
+		if previous is None or previous["median"] <= 0:
+			continue
+		ratio = result["median"] / previous["median"]
+		flag = ""
+		if ratio > 1 + threshold:
+			flag = "  SLOWER"
+			regressions += 1
+		elif ratio < 1 - threshold:
+			flag = "  faster"
+		print(f"{result['name']:<50} {str(result['scale']):>12} {previous['median']:>12.4f} -> {result['median']:>12.4f} ms  x{ratio:.2f}{flag}")
+	return regressions
+
+def main():
+
+	parser = argparse.ArgumentParser(description="Benchmarks of the STE label tool")
+	parser.add_argument("--scales", default=",".join(str(scale) for scale in DEFAULT_SCALES), help="comma separated event counts")
+	parser.add_argument("--videos", default=",".join(f"{width}x{height}" for width, height in DEFAULT_VIDEOS), help="comma separated WxH of the test videos")
+	parser.add_argument("--repeat", type=int, default=5)
+	parser.add_argument("--output", default="benchmark_results.json")
+	parser.add_argument("--workdir", default=None, help="keep the generated files here instead of a temporary directory")
+	parser.add_argument("--core-only", action="store_true", help="skip the benchmarks creating the Qt window")
+	parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files instead of running")
+	parser.add_argument("--threshold", type=float, default=0.1, help="relative change reported by --compare")
+	args = parser.parse_args()
+
+	if args.compare:
+		sys.exit(1 if compare(args.compare[0], args.compare[1], args.threshold) else 0)
+
+	scales = [int(scale) for scale in args.scales.split(",") if scale]
+	videos = [tuple(int(value) for value in video.split("x")) for video in args.videos.split(",") if video]
+	temporary = None
+	if args.workdir is None:
+		temporary = tempfile.TemporaryDirectory(prefix="ste_bench_")
+		workdir = temporary.name
+	else:
+		workdir = os.path.abspath(args.workdir)
+		os.makedirs(workdir, exist_ok=True)
+	output = os.path.abspath(args.output)
+
+	benchmarks = Benchmarks(workdir, args.repeat)
+	try:
+		for scale in scales:
+			benchmarks.run_core(scale)
+		if not args.core_only:
+			for scale in scales:
+				benchmarks.run_display_list(scale)
+			for width, height in videos:
+				benchmarks.run_overlay(width, height)
+	finally:
+		benchmarks.close()
+
+	with open(output, 'w') as file:
+		json.dump({
+			"revision": git_revision(),
+			"time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+			"python": platform.python_version(),
+			"platform": platform.platform(),
+			"opencv": cv2.__version__,
+			"pandas": pd.__version__,
+			"repeat": args.repeat,
+			"results": benchmarks.results,
+		}, file, indent=1)
+	print(f"Results written to {output}")
+	if temporary is not None:
+		temporary.cleanup()
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+
+from PyQt5.QtCore import QObject, QTimer, Qt
+
+from utils.tracing import tracer
+
+
+def monitor_requested():
+    return "--loop-latency" in sys.argv or os.environ.get("STE_LOOP_LATENCY") == "1"
+
+
+class EventLoopMonitor(QObject):
+    """
+    Measures the GUI event-loop latency: how late a timer due every `interval` ms actually runs.
+    That lateness is what a key press or a decoded frame waits before being handled.
+    - Every `report_every` seconds the median, 95th percentile and maximum are printed
+      with the playback state from describe()
+    - With tracing on they are also added to the trace as a counter
+    Enabled with --loop-latency on the command line or STE_LOOP_LATENCY=1.
+    """
+
+    def __init__(self, describe=None, interval=10, report_every=5.0):
+        super().__init__()
+        self.describe = describe
+        self.interval = interval
+        self.report_every = report_every
+        self.samples = []
+        self.last_tick = None
+        self.last_report = time.perf_counter()
+
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self.tick)
+
+    def start(self):
+        self.last_tick = time.perf_counter()
+        self.last_report = self.last_tick
+        self.timer.start(self.interval)
+
+    def stop(self):
+        self.timer.stop()
+
+    def tick(self):
+        now = time.perf_counter()
+        self.samples.append(max(0.0, (now - self.last_tick) * 1000.0 - self.interval))
+        self.last_tick = now
+        if now - self.last_report >= self.report_every:
+            self.report()
+            self.last_report = now
+
+    def statistics(self):
+        """
+        (median, 95th percentile, max) latency in ms of the samples since the last report.
+        """
+        if not self.samples:
+            return 0.0, 0.0, 0.0
+        samples = sorted(self.samples)
+        return samples[len(samples) // 2], samples[min(len(samples) - 1, int(len(samples) * 0.95))], samples[-1]
+
+    def report(self):
+        median, p95, maximum = self.statistics()
+        context = f" ({self.describe()})" if self.describe is not None else ""
+        print(f"Event loop latency{context}: median {median:.1f} ms, p95 {p95:.1f} ms, max {maximum:.1f} ms")
+        if tracer.enabled:
+            tracer.counter("event loop latency (ms)", {"median": median, "p95": p95, "max": maximum})
+        self.samples = []
@@ -3,6 +3,7 @@ from PyQt5.QtGui import QPalette
 from PyQt5.QtCore import Qt
 from utils.event_class import Event, ms_to_time
 from interface.txt_opener import TextFileOpener
+from utils.tracing import traced
 
 class EventSelectionWindow(QWidget):
     def __init__(self, main_window):
@@ -91,6 +92,11 @@ class EventSelectionWindow(QWidget):
         self.populate_list_widget(self.list_widget, self.labels)
         self.populate_list_widget(self.list_widget_second, self.second_labels)
 
+        # Keep the filter bar of the event list in sync (it does not exist yet on startup)
+        list_display = getattr(self.main_window, "list_display", None)
+        if list_display is not None:
+            list_display.refresh_filter_options()
+
     def update_coordinates(self, x, y):
         """Update the displayed coordinates."""
         self.x_coord = x
@@ -132,6 +138,7 @@ class EventSelectionWindow(QWidget):
         self.list_widget_second.setCurrentRow(-1)
         self.main_window.setFocus()
 
+    @traced
     def save_event(self):
         """Save the selected event."""
         self.first_label = self.list_widget.currentItem()
@@ -141,12 +148,11 @@ class EventSelectionWindow(QWidget):
 
         self.first_label = self.list_widget.currentItem().text() #event
         self.second_label = self.list_widget_second.currentItem().text() #team
-        position = self.main_window.media_player.media_player.position()
-        frame = int(position / 1000 * self.main_window.media_player.frame_rate)
+        position = self.main_window.media_player.displayed_position()
+        frame = self.main_window.media_player.timestamps.frame_at(position)
         # self.x_coord = -1
         # self.y_coord = -1
         self.main_window.list_manager.add_event(Event(frame, self.second_label, self.first_label, ms_to_time(position)[0], ms_to_time(position)[1], self.x_coord, self.y_coord, position))
-        self.main_window.list_display.display_list(self.main_window.list_manager.create_text_list())
 
         # Reset label variables and save to file
         self.first_label = None
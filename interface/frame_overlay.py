@@ -0,0 +1,128 @@
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtCore import Qt, QRect, QPointF
+from PyQt5.QtGui import QImage, QPainter, QPen, QColor
+
+from utils.lazy_import import lazy_import
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+# Qt 5.14+ displays OpenCV's BGR order directly, older versions need a conversion
+BGR_FORMAT = getattr(QImage, "Format_BGR888", None)
+
+
+class FrameOverlay(QWidget):
+    """
+    Decoded frame shown on top of the QVideoWidget, letterboxed the same way, with markers.
+    - The frame is resized straight into a canvas buffer the size of the widget. The buffer
+      and the QImage over it are only reallocated when the widget is resized, and the
+      image is painted without converting it to a QPixmap
+    - Markers are frame pixel coordinates drawn in widget space at paint time, so changing
+      them does not redraw the frame
+    Frames passed in are only read, so frames shared with the decoder cache need no copy.
+    Without a frame only the markers are painted and the video shows through.
+    """
+
+    def __init__(self, parent=None, marker_color=Qt.red):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents, True)
+
+        # Frame currently shown, kept to re-render it after a resize
+        self.frame = None
+        # (width, height) of the video frames, used to place markers
+        self.video_size = None
+        self.markers = []
+
+        self.canvas = None
+        self.image = None
+        # Area of the canvas the frame was last resized into
+        self.target = QRect()
+
+        self.marker_size = 5
+        self.marker_pen = QPen(QColor(marker_color))
+        self.marker_pen.setWidth(1)
+
+    def set_video_size(self, width, height):
+        self.video_size = (int(width), int(height)) if width and height else None
+        self.update()
+
+    def set_frame(self, frame, video_size=None):
+        """
+        video_size : (width, height) markers are given in, when the frame is a scaled-down copy
+        """
+        self.frame = frame
+        self.video_size = tuple(video_size) if video_size else (frame.shape[1], frame.shape[0])
+        self.render_frame()
+        self.update()
+
+    def set_markers(self, markers):
+        """
+        markers: (x, y) frame pixel coordinates
+        """
+        self.markers = list(markers)
+        self.update()
+
+    def clear(self):
+        """
+        Drops the frame and markers, the buffers are kept for the next frame.
+        """
+        self.frame = None
+        self.markers = []
+        self.update()
+
+    def video_rect(self):
+        """
+        Where the video is displayed in the widget, assuming aspect-ratio-preserving fit.
+        """
+        if self.video_size is None:
+            return QRect()
+        video_w, video_h = self.video_size
+        scale = min(self.width() / video_w, self.height() / video_h)
+        scaled_w = max(1, int(video_w * scale))
+        scaled_h = max(1, int(video_h * scale))
+        return QRect((self.width() - scaled_w) // 2, (self.height() - scaled_h) // 2, scaled_w, scaled_h)
+
+    def allocate(self):
+        width, height = max(1, self.width()), max(1, self.height())
+        if self.canvas is not None and self.canvas.shape[:2] == (height, width):
+            return
+        # Black bars are the parts of the canvas never written to
+        self.canvas = np.zeros((height, width, 3), dtype=np.uint8)
+        self.image = QImage(self.canvas.data, width, height, 3 * width, BGR_FORMAT if BGR_FORMAT is not None else QImage.Format_RGB888)
+        self.target = QRect()
+
+    def render_frame(self):
+        if self.frame is None:
+            return
+        self.allocate()
+        target = self.video_rect()
+        if target != self.target:
+            self.canvas.fill(0)
+            self.target = target
+        region = self.canvas[target.top():target.top() + target.height(), target.left():target.left() + target.width()]
+        resized = cv2.resize(self.frame, (target.width(), target.height()), dst=region, interpolation=cv2.INTER_LINEAR)
+        if resized is not region:
+            # Older OpenCV versions may not write into a strided view
+            region[...] = resized
+        if BGR_FORMAT is None:
+            cv2.cvtColor(region, cv2.COLOR_BGR2RGB, dst=region)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.render_frame()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        if self.frame is not None and self.image is not None:
+            painter.drawImage(0, 0, self.image)
+        rect = self.video_rect()
+        if self.markers and rect.isValid():
+            painter.setPen(self.marker_pen)
+            scale_x = rect.width() / self.video_size[0]
+            scale_y = rect.height() / self.video_size[1]
+            size = self.marker_size
+            for x, y in self.markers:
+                # Centre of the frame pixel
+                center = QPointF(rect.left() + (x + 0.5) * scale_x, rect.top() + (y + 0.5) * scale_y)
+                painter.drawLine(center - QPointF(size, 0), center + QPointF(size, 0))
+                painter.drawLine(center - QPointF(0, size), center + QPointF(0, size))
+        painter.end()
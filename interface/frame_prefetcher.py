@@ -0,0 +1,62 @@
+import threading
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class FramePrefetcher(QObject):
+    """
+    Decodes frames on a background thread into the VideoDecoder cache.
+    - request() replaces the queue, so stale work is dropped when the selection moves
+    - frame_ready(index) is emitted (queued to the GUI thread) after each decode attempt
+    One worker per decoder, since an OpenCV capture cannot decode in parallel.
+    """
+    frame_ready = pyqtSignal(int)
+
+    def __init__(self, decoder):
+        super().__init__()
+        self.decoder = decoder
+        self.queue = []
+        self.running = True
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self._run, name="frame-prefetch", daemon=True)
+        self.thread.start()
+
+    def request(self, indices):
+        """
+        indices: frame indices, most important first. Cached ones are skipped.
+        """
+        wanted = []
+        for index in indices:
+            if index not in wanted and self.decoder.peek(index) is None:
+                wanted.append(index)
+        with self.condition:
+            self.queue = wanted
+            self.condition.notify()
+
+    def request_first(self, index):
+        """
+        Put one frame in front of the queue, keeping the rest of the queued work.
+        """
+        with self.condition:
+            self.queue = [index] + [other for other in self.queue if other != index]
+            self.condition.notify()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.queue = []
+            self.condition.notify()
+        self.thread.join(timeout=2.0)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.running and not self.queue:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                index = self.queue.pop(0)
+
+            # Emitted on failure too, the receiver finds nothing in the cache
+            self.decoder.frame_at(index)
+            self.frame_ready.emit(index)
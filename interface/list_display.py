@@ -1,7 +1,135 @@
-from PyQt5.QtWidgets import QWidget, QPushButton, QStyle, QSlider, QHBoxLayout, QVBoxLayout, QFileDialog, QGridLayout, QListWidget
+import bisect
+
+from PyQt5.QtWidgets import QWidget, QPushButton, QStyle, QSlider, QHBoxLayout, QVBoxLayout, QFileDialog, QGridLayout, QListView, QComboBox, QLineEdit
 from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
 from PyQt5.QtMultimediaWidgets import QVideoWidget
-from PyQt5.QtCore import Qt, QUrl
+from PyQt5.QtCore import Qt, QUrl, QAbstractListModel, QModelIndex
+
+from utils.event_index import ID_MASK, make_key
+from utils.event_filter import EventFilter
+from utils.tracing import traced
+
+# Role returning the stable event_id of a row
+EventIdRole = Qt.UserRole
+
+ALL_ITEMS = "All"
+
+def parse_bound(text):
+	# "mm:ss" or "mm:ss.fff" is a time in ms, a plain number is a frame; returns (ms, frame)
+	text = text.strip()
+	try:
+		if ":" in text:
+			minutes, seconds = text.split(":", 1)
+			return int(round((int(minutes) * 60 + float(seconds)) * 1000)), None
+		if text:
+			return None, int(text)
+	except ValueError:
+		pass
+	return None, None
+
+class EventListModel(QAbstractListModel):
+# Read-only view of the ListManager events, rows are formatted when the view asks for them.
+# The ListManager reports every change, so rows are inserted and removed one by one.
+# With a filter set, the model shows the keys returned by the filter index instead.
+
+	def __init__(self, list_manager):
+		super().__init__()
+
+		self.list_manager = list_manager
+		self.list_manager.add_listener(self)
+
+		self.event_filter = None
+		# Sorted keys of the filtered events (time ascending), None without a filter
+		self.keys = None
+
+	def set_filter(self, event_filter):
+		self.beginResetModel()
+		if event_filter is None or event_filter.is_empty():
+			self.event_filter = None
+			self.keys = None
+		else:
+			self.event_filter = event_filter
+			self.keys = self.list_manager.filter_keys(event_filter)
+		self.endResetModel()
+
+	def rowCount(self, parent=QModelIndex()):
+		if parent.isValid():
+			return 0
+		if self.keys is not None:
+			return len(self.keys)
+		return len(self.list_manager.events)
+
+	def event_for_row(self, row):
+		if self.keys is None:
+			return self.list_manager.event_at(row)
+		return self.list_manager.events.get(self.keys[len(self.keys) - 1 - row] & ID_MASK)
+
+	def data(self, index, role=Qt.DisplayRole):
+		if not index.isValid():
+			return None
+		event = self.event_for_row(index.row())
+		if role == Qt.DisplayRole:
+			return event.to_text()
+		if role == EventIdRole:
+			return event.event_id
+		return None
+
+	def index_of(self, event_id):
+		if self.keys is None:
+			return self.index(self.list_manager.row_of(event_id))
+		key = make_key(self.list_manager.events.position_of(event_id), event_id)
+		position = bisect.bisect_left(self.keys, key)
+		if position == len(self.keys) or self.keys[position] != key:
+			return QModelIndex()
+		return self.index(len(self.keys) - 1 - position)
+
+	def key_at_list_row(self, row):
+		# Key of a row of the unfiltered ListManager list
+		events = self.list_manager.events
+		return events.keys[len(events) - 1 - row]
+
+	# ListManager listener, rows are in unfiltered list coordinates
+	def begin_reset(self):
+		self.beginResetModel()
+
+	def end_reset(self):
+		if self.event_filter is not None:
+			self.keys = self.list_manager.filter_keys(self.event_filter)
+		self.endResetModel()
+
+	def begin_insert(self, row):
+		if self.keys is None:
+			self.beginInsertRows(QModelIndex(), row, row)
+
+	def end_insert(self, row):
+		if self.keys is None:
+			self.endInsertRows()
+			return
+		key = self.key_at_list_row(row)
+		if not self.event_filter.matches(self.list_manager.events.get(key & ID_MASK)):
+			return
+		position = bisect.bisect_left(self.keys, key)
+		filtered_row = len(self.keys) - position
+		self.beginInsertRows(QModelIndex(), filtered_row, filtered_row)
+		self.keys.insert(position, key)
+		self.endInsertRows()
+
+	def begin_remove(self, row):
+		if self.keys is None:
+			self.beginRemoveRows(QModelIndex(), row, row)
+			return
+		key = self.key_at_list_row(row)
+		position = bisect.bisect_left(self.keys, key)
+		if position == len(self.keys) or self.keys[position] != key:
+			return
+		filtered_row = len(self.keys) - 1 - position
+		self.beginRemoveRows(QModelIndex(), filtered_row, filtered_row)
+		del self.keys[position]
+		self.endRemoveRows()
+
+	def end_remove(self, row):
+		if self.keys is None:
+			self.endRemoveRows()
 
 class ListDisplay(QWidget):
 
@@ -16,28 +144,98 @@ class ListDisplay(QWidget):
 		self.layout = QGridLayout()
 		self.setLayout(self.layout)
 
-		self.list_widget = QListWidget()
-		self.list_widget.clicked.connect(self.clicked)
-		self.list_widget.itemDoubleClicked.connect(self.doubleClicked)
+		self.model = EventListModel(self.main_window.list_manager)
+
+		self.list_view = QListView()
+		# All rows have the same height and are laid out in batches,
+		# so an insert or remove does not re-layout every row
+		self.list_view.setUniformItemSizes(True)
+		self.list_view.setLayoutMode(QListView.Batched)
+		self.list_view.setBatchSize(1000)
+		self.list_view.setModel(self.model)
+		self.list_view.clicked.connect(self.clicked)
+		self.list_view.doubleClicked.connect(self.doubleClicked)
+		self.list_view.selectionModel().currentChanged.connect(self.current_changed)
+
+		# Events on each side of the current row whose frames are decoded ahead of time
+		self.prefetch_radius = 8
 
-		self.layout.addWidget(self.list_widget)
+		# Filter bar: event class, team and a time or frame range
+		self.event_filter_box = QComboBox()
+		self.team_filter_box = QComboBox()
+		self.start_filter_edit = QLineEdit()
+		self.start_filter_edit.setPlaceholderText("From (mm:ss or frame)")
+		self.end_filter_edit = QLineEdit()
+		self.end_filter_edit.setPlaceholderText("To (mm:ss or frame)")
+		self.refresh_filter_options()
+		self.event_filter_box.currentIndexChanged.connect(self.apply_filter)
+		self.team_filter_box.currentIndexChanged.connect(self.apply_filter)
+		self.start_filter_edit.textChanged.connect(self.apply_filter)
+		self.end_filter_edit.textChanged.connect(self.apply_filter)
+
+		self.layout.addWidget(self.event_filter_box, 0, 0)
+		self.layout.addWidget(self.team_filter_box, 0, 1)
+		self.layout.addWidget(self.start_filter_edit, 1, 0)
+		self.layout.addWidget(self.end_filter_edit, 1, 1)
+		self.layout.addWidget(self.list_view, 2, 0, 1, 2)
+
+	def refresh_filter_options(self):
+		# Event classes and teams from the configuration, keeping the current choice
+		event_window = self.main_window.event_window
+		for box, labels in ((self.event_filter_box, event_window.labels), (self.team_filter_box, event_window.second_labels)):
+			current = box.currentText()
+			box.blockSignals(True)
+			box.clear()
+			box.addItem(ALL_ITEMS)
+			box.addItems([label for label in labels if label])
+			box.setCurrentIndex(max(box.findText(current), 0))
+			box.blockSignals(False)
+
+	def current_filter(self):
+		event_name = self.event_filter_box.currentText()
+		team = self.team_filter_box.currentText()
+		start_ms, start_frame = parse_bound(self.start_filter_edit.text())
+		end_ms, end_frame = parse_bound(self.end_filter_edit.text())
+		return EventFilter(
+			event=None if event_name in ("", ALL_ITEMS) else event_name,
+			team=None if team in ("", ALL_ITEMS) else team,
+			start_ms=start_ms,
+			end_ms=end_ms,
+			start_frame=start_frame,
+			end_frame=end_frame
+		)
+
+	def apply_filter(self, *args):
+		self.model.set_filter(self.current_filter())
 
 	def clicked(self, qmodelindex):
-		item = self.list_widget.currentItem()
 		self.main_window.media_player.hide_frame_overlay()
 
-	# def doubleClicked(self, item):
-	# 	row = self.list_widget.currentRow()
-	# 	position = self.main_window.list_manager.event_list[row].position
-	# 	event = self.main_window.list_manager.event_list[row]
-	# 	# self.main_window.media_player.set_annotation_point(event.x_coord, event.y_coord)
-	# 	if self.main_window.media_player.play_button.isEnabled():
-	# 		self.main_window.media_player.set_position(position)
-	# 	self.main_window.setFocus()
+	def current_changed(self, current, previous):
+		self.prefetch_selection()
+
+	def prefetch_selection(self):
+		row = max(self.list_view.currentIndex().row(), 0)
+		count = self.model.rowCount()
+		rows = range(max(0, row - self.prefetch_radius), min(count, row + self.prefetch_radius + 1))
+		# Closest events first
+		rows = sorted(rows, key=lambda other: abs(other - row))
+		positions = [self.model.event_for_row(other).position for other in rows]
+		self.main_window.media_player.prefetch_positions(positions)
+
+	def current_event_id(self):
+		index = self.list_view.currentIndex()
+		if not index.isValid():
+			return None
+		return index.data(EventIdRole)
+
+	def clear_selection(self):
+		self.list_view.setCurrentIndex(QModelIndex())
+		self.list_view.clearSelection()
 
-	def doubleClicked(self, item):
-		row = self.list_widget.currentRow()
-		event = self.main_window.list_manager.event_list[row]
+	def doubleClicked(self, qmodelindex):
+		event_id = qmodelindex.data(EventIdRole)
+		event = self.main_window.list_manager.events.get(event_id)
 
 		if self.main_window.media_player.play_button.isEnabled():
 			# jump to time first
@@ -53,7 +251,8 @@ class ListDisplay(QWidget):
 		self.main_window.setFocus()
 
 
-	def display_list(self, list_to_display):
-		self.list_widget.clear()
-		for item_nbr, element in enumerate(list_to_display):
-			self.list_widget.insertItem(item_nbr,element)
\ No newline at end of file
+	@traced
+	def display_list(self):
+		# Full refresh, edits already update the view row by row
+		self.model.beginResetModel()
+		self.model.endResetModel()
@@ -1,15 +1,25 @@
-from PyQt5.QtWidgets import QMainWindow, QWidget, QHBoxLayout
+import os
+
+from PyQt5.QtWidgets import QMainWindow, QWidget, QHBoxLayout, QMessageBox
 from PyQt5.QtGui import QPalette
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtMultimedia import QMediaPlayer
 
 from interface.media_player import MediaPlayer
 from interface.list_display import ListDisplay
 from interface.event_selection import EventSelectionWindow
+from interface.event_loop_monitor import EventLoopMonitor, monitor_requested
 from utils.list_management import ListManager
+from utils.label_writer import LabelWriter
+from utils.sqlite_store import SqliteStore
 from utils.event_class import Event, ms_to_time
+from utils.startup_timing import startup_timer
 
 class MainWindow(QMainWindow):
+
+	# Message from the label writer thread when a save fails
+	save_failed = pyqtSignal(str)
+
 	def __init__(self):
 		super().__init__()
 
@@ -19,8 +29,6 @@ class MainWindow(QMainWindow):
 		self.width_main_window = 1920 
 		self.height_main_window = 1080
 
-		self.frame_duration_ms = 40
-
 		self.half = 1
 
 		# Defining some variables of the window
@@ -42,20 +50,35 @@ class MainWindow(QMainWindow):
 	def init_main_window(self):
 
 		# Add the media player
-		self.media_player = MediaPlayer(self)
+		with startup_timer.section("  MediaPlayer"):
+			self.media_player = MediaPlayer(self)
 		video_display = QWidget(self)
 		video_display.setLayout(self.media_player.layout)
 		self.media_player.video_widget.frame_clicked.connect(self.update_coordinates)
 
 		# Create the Event selection Window
-		self.event_window = EventSelectionWindow(self)
+		with startup_timer.section("  EventSelectionWindow"):
+			self.event_window = EventSelectionWindow(self)
 
-		# Add the list
-		self.list_display = ListDisplay(self)
-
-		# Create the original list of labels
+		# Create the original list of labels, saved off the GUI thread
 		self.list_manager = ListManager()
-		self.list_display.display_list(self.list_manager.create_text_list())
+		self.list_manager.writer = LabelWriter(on_error=self.save_failed.emit)
+		# Optional sqlite database for the annotations instead of the csv journal
+		if os.environ.get("STE_LABEL_DB"):
+			self.list_manager.store = SqliteStore(os.environ["STE_LABEL_DB"])
+		self.save_failed.connect(self.show_save_error)
+		# Live markers follow the edits
+		self.list_manager.add_listener(self.media_player)
+
+		# Optional measurement of the event-loop latency, e.g. during 2x/4x playback
+		self.loop_monitor = None
+		if monitor_requested():
+			self.loop_monitor = EventLoopMonitor(describe=self.playback_state)
+			self.loop_monitor.start()
+
+		# Add the list, it follows the list manager through its model
+		with startup_timer.section("  ListDisplay"):
+			self.list_display = ListDisplay(self)
 
 
 		# Layout the different widgets
@@ -75,6 +98,18 @@ class MainWindow(QMainWindow):
 
 		central_display.setLayout(final_layout)
 
+	def paintEvent(self, event):
+
+		super().paintEvent(event)
+		# Only reports once, with --startup-timing
+		startup_timer.report()
+
+	def playback_state(self):
+
+		player = self.media_player.media_player
+		state = "playing" if player.state() == QMediaPlayer.PlayingState else "paused"
+		return f"{state} at {player.playbackRate():g}x"
+
 	def update_coordinates(self, x, y):
 		# Update the coordinates in the EventSelectionWindow
 		self.media_player.hide_frame_overlay()
@@ -83,14 +118,13 @@ class MainWindow(QMainWindow):
 
 	def keyPressEvent(self, event):
 
-		ctrl = False
+		ctrl = bool(event.modifiers() & Qt.ControlModifier)
 		self.media_player.hide_frame_overlay()
 		# Remove an event with the delete key
 		if event.key() == Qt.Key_Delete or event.key() == Qt.Key_Backspace:
-			index = self.list_display.list_widget.currentRow()
-			if index >= 0:
-				self.list_manager.delete_event(index)
-				self.list_display.display_list(self.list_manager.create_text_list())
+			event_id = self.list_display.current_event_id()
+			if event_id is not None:
+				self.list_manager.delete_event(event_id)
 				path_label = self.media_player.path_label
 				self.list_manager.save_file(path_label, self.half)
 			self.setFocus()
@@ -104,17 +138,12 @@ class MainWindow(QMainWindow):
 		# Move one frame backwards in time
 		if event.key() == Qt.Key_Left:
 			if self.media_player.play_button.isEnabled():
-				position = self.media_player.media_player.position()
-				if position > self.frame_duration_ms:
-					self.media_player.media_player.setPosition(position-self.frame_duration_ms)
+				self.media_player.previous_frame()
 			self.setFocus()
 		
 		if event.key() == Qt.Key_Right:
 			if self.media_player.play_button.isEnabled():
-				position = self.media_player.media_player.position()
-				duration = self.media_player.media_player.duration()
-				if position < duration - self.frame_duration_ms:
-					self.media_player.media_player.setPosition(position+self.frame_duration_ms)
+				self.media_player.next_frame()
 			self.setFocus()
 
 		# Enter a new annotation
@@ -134,7 +163,7 @@ class MainWindow(QMainWindow):
 			self.setFocus()
 
 		# Set the playback rate to x2
-		if event.key() == Qt.Key_F2 or event.key() == Qt.Key_Z:
+		if event.key() == Qt.Key_F2 or (event.key() == Qt.Key_Z and not ctrl):
 			position = self.media_player.media_player.position()
 			self.media_player.media_player.setPlaybackRate(2.0)
 			self.media_player.media_player.setPosition(position)
@@ -147,14 +176,57 @@ class MainWindow(QMainWindow):
 			self.media_player.media_player.setPosition(position)
 			self.setFocus()
 
-		if event.key() == Qt.Key_Escape:
-			self.list_display.list_widget.setCurrentRow(-1)
+		# Show or hide the markers of the events around the current position
+		if event.key() == Qt.Key_M:
+			if self.media_player.live_markers_button.isEnabled():
+				self.media_player.live_markers_button.toggle()
 			self.setFocus()
 
-		if event.modifiers() and Qt.ControlModifier:
-			ctrl = True
+		if event.key() == Qt.Key_Escape:
+			self.list_display.clear_selection()
+			self.setFocus()
 
 		if event.key() == Qt.Key_S and ctrl:
 			if self.media_player.play_button.isEnabled():
 				path_label = self.media_player.get_last_label_file()
-				self.list_manager.save_file(path_label, self.half)
\ No newline at end of file
+				self.list_manager.compact_file(path_label, self.half)
+
+		# Undo with Ctrl+Z, redo with Ctrl+Y or Ctrl+Shift+Z
+		if event.key() == Qt.Key_Z and ctrl:
+			if event.modifiers() & Qt.ShiftModifier:
+				self.redo_edit()
+			else:
+				self.undo_edit()
+			self.setFocus()
+
+		if event.key() == Qt.Key_Y and ctrl:
+			self.redo_edit()
+			self.setFocus()
+
+	def undo_edit(self):
+
+		if self.list_manager.undo():
+			self.list_manager.save_file(self.media_player.path_label, self.half)
+
+	def redo_edit(self):
+
+		if self.list_manager.redo():
+			self.list_manager.save_file(self.media_player.path_label, self.half)
+
+	def show_save_error(self, message):
+
+		QMessageBox.warning(self, "Save failed", message)
+
+	def closeEvent(self, event):
+
+		# Fold the edit journal back into the label csv before exiting
+		path_label = self.media_player.get_last_label_file()
+		self.list_manager.compact_file(path_label, self.half)
+		self.list_manager.writer.close()
+		if self.list_manager.store is not None:
+			self.list_manager.store.close()
+		self.media_player.stop_timestamp_scan()
+		self.media_player.stop_proxy_generation()
+		self.media_player.close_project()
+		self.media_player.release_decoder()
+		event.accept()
\ No newline at end of file
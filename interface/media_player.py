@@ -1,20 +1,34 @@
 import os
-import cv2
-import pandas as pd
+import threading
+import time
+from utils.lazy_import import lazy_import
+pd = lazy_import("pandas")
 
 from PyQt5.QtWidgets import (
     QWidget, QPushButton, QStyle, QSlider,
     QHBoxLayout, QVBoxLayout, QFileDialog, QLabel,
-    QStackedLayout
+    QStackedLayout, QMessageBox
 )
 from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
 from PyQt5.QtMultimediaWidgets import QVideoWidget
-from PyQt5.QtCore import Qt, QUrl, QRect, QSize, QPoint, pyqtSignal
-from PyQt5.QtGui import QMouseEvent
+from PyQt5.QtCore import Qt, QUrl, QRect, QSize, QPoint, QTimer, pyqtSignal
+from PyQt5.QtGui import QMouseEvent, QGuiApplication
 from PyQt5.QtWidgets import QLabel
-from PyQt5.QtGui import QImage, QPixmap
 
-import numpy as np
+from utils.video_decoder import VideoDecoder
+from utils.frame_ring import FrameStepper
+from utils.probe_cache import ProbeCache
+from utils.frame_timestamps import (
+    FrameTimestamps, scan_timestamps, load_timestamps, save_timestamps,
+    timestamp_scan_mode, has_constant_frame_rate, lower_thread_priority
+)
+from utils.proxy_video import load_proxy, make_proxy, proxy_unusable
+from utils.media_paths import label_path_for
+from interface.frame_prefetcher import FramePrefetcher
+from interface.frame_overlay import FrameOverlay
+from interface.seek_scheduler import SeekScheduler
+from interface.project_browser import ProjectBrowser
+from utils.tracing import traced
 
 
 class CustomVideoWidget(QVideoWidget):
@@ -104,9 +118,18 @@ class MediaPlayer(QWidget):
     MediaPlayer widget:
     - Uses Qt for playback/display (QMediaPlayer + QVideoWidget)
     - Uses OpenCV to reliably extract video width/height/FPS (instead of Qt metadata)
-    - Maintains frame stepping based on FPS
+    - Maintains frame stepping based on per-frame timestamps (FPS until the video is scanned)
+    - Optionally steps frames through OpenCV while paused, back-steps served from a ring buffer
+    - Optionally plays a low-resolution proxy of the video, transcoded in the background;
+      positions, frames and click coordinates stay those of the original
     - Creates/loads Labels.csv in the video folder
     """
+    # (video path, frame timestamps) from the background scan
+    timestamps_scanned = pyqtSignal(str, object)
+    # (video path, proxy path or None, frame timestamps or None) from the proxy transcode
+    proxy_ready = pyqtSignal(str, object, object)
+    # (video path, percent done)
+    proxy_progress = pyqtSignal(str, int)
 
     def __init__(self, main_window):
         super().__init__()
@@ -116,6 +139,9 @@ class MediaPlayer(QWidget):
         # Qt Media Player
         self.media_player = QMediaPlayer(None, QMediaPlayer.VideoSurface)
 
+        # Seeks from frame stepping and the slider, only the latest target is kept
+        self.seeker = SeekScheduler(self.media_player)
+
         # Video display widget
         # self.video_widget = CustomVideoWidget()
 
@@ -132,6 +158,10 @@ class MediaPlayer(QWidget):
         self.open_file_button = QPushButton("Open video")
         self.open_file_button.clicked.connect(self.open_file)
 
+        self.open_project_button = QPushButton("Open project")
+        self.open_project_button.clicked.connect(self.open_project)
+        self.project_browser = None
+
         self.play_button = QPushButton()
         self.play_button.setEnabled(False)
         self.play_button.setIcon(self.style().standardIcon(QStyle.SP_MediaPlay))
@@ -145,6 +175,21 @@ class MediaPlayer(QWidget):
         self.next_frame_button.setEnabled(False)
         self.next_frame_button.clicked.connect(self.next_frame)
 
+        self.live_markers_button = QPushButton("Markers")
+        self.live_markers_button.setCheckable(True)
+        self.live_markers_button.setEnabled(False)
+        self.live_markers_button.toggled.connect(self.set_live_markers)
+
+        self.step_buffer_button = QPushButton("Step buffer")
+        self.step_buffer_button.setCheckable(True)
+        self.step_buffer_button.setEnabled(False)
+        self.step_buffer_button.toggled.connect(self.set_step_buffer)
+
+        self.proxy_button = QPushButton("Proxy")
+        self.proxy_button.setCheckable(True)
+        self.proxy_button.setEnabled(False)
+        self.proxy_button.toggled.connect(self.set_use_proxy)
+
         self.frame_label = QLabel("Frame: 0")
         self.frame_label.setAlignment(Qt.AlignCenter)
 
@@ -156,9 +201,13 @@ class MediaPlayer(QWidget):
         hbox = QHBoxLayout()
         hbox.setContentsMargins(0, 0, 0, 0)
         hbox.addWidget(self.open_file_button)
+        hbox.addWidget(self.open_project_button)
         hbox.addWidget(self.play_button)
         hbox.addWidget(self.prev_frame_button)
         hbox.addWidget(self.next_frame_button)
+        hbox.addWidget(self.live_markers_button)
+        hbox.addWidget(self.step_buffer_button)
+        hbox.addWidget(self.proxy_button)
         hbox.addWidget(self.frame_label)
         hbox.addWidget(self.slider)
 
@@ -182,11 +231,68 @@ class MediaPlayer(QWidget):
         self.frame_rate = 30.0  # default fallback
         self.is_media_loaded = False
 
-        self.frame_overlay_label = QLabel(self.video_container)
-        self.frame_overlay_label.setScaledContents(True)
-        self.frame_overlay_label.hide()
-        self.frame_overlay_label.setAttribute(Qt.WA_TransparentForMouseEvents, True)
-        self.frame_overlay_label.raise_()
+        # Width, height, FPS, duration, frame count and codec of the opened video
+        self.probe_cache = ProbeCache()
+        self.video_info = None
+
+        # All ms <-> frame conversions, exact once the video's frame timestamps are known
+        self.timestamps = FrameTimestamps(self.frame_rate)
+        self.timestamp_scan_stop = None
+        # Whether a scan was started for the current video, see STE_PTS_SCAN
+        self.timestamp_scan_started = False
+        self.timestamp_scan_mode = timestamp_scan_mode()
+        # Share of the time the scan thread decodes, it pauses the rest so playback is not starved
+        self.timestamp_scan_load = 0.5
+        self.timestamps_scanned.connect(self.set_scanned_timestamps)
+
+        # Low-resolution proxy played instead of the video when enabled, and the
+        # background transcode producing it
+        self.use_proxy = False
+        self.proxy_file = None
+        self.proxy_stop = None
+        self.proxy_ready.connect(self.set_proxy)
+        self.proxy_progress.connect(self.show_proxy_progress)
+
+        # Persistent OpenCV decoder for the overlay, created per opened video,
+        # and the background thread filling its cache
+        self.decoder = None
+        self.prefetcher = None
+        # (frame index, x, y) of an overlay waiting for its frame to be decoded
+        self.pending_overlay = None
+
+        # Frame stepping through OpenCV while paused: the stepped frame is shown over the
+        # video, and the player only seeks to it once the stepping stops
+        self.step_buffer_enabled = False
+        self.stepper = None
+        self.step_index = None
+        self.step_sync_delay = 300
+        self.step_timer = QTimer(self)
+        self.step_timer.setSingleShot(True)
+        self.step_timer.timeout.connect(self.sync_step_position)
+
+        # position_changed only records the position; the slider, frame label and live
+        # markers are refreshed at most once per display refresh, and only when they change
+        self.ui_position = 0
+        self.ui_updated_at = 0.0
+        self.ui_interval_ms = None
+        self.shown_frame = None
+        self.ui_timer = QTimer(self)
+        self.ui_timer.setSingleShot(True)
+        self.ui_timer.timeout.connect(self.update_position_ui)
+
+        # Markers of the events within live_marker_radius frames of the position,
+        # a transparent layer over the video kept below the frame overlay
+        self.step_view = FrameOverlay(self.video_container)
+        self.step_view.hide()
+
+        self.live_markers = FrameOverlay(self.video_container, marker_color=Qt.yellow)
+        self.live_markers.hide()
+        self.live_markers_enabled = False
+        self.live_marker_radius = 12
+
+        self.frame_overlay = FrameOverlay(self.video_container)
+        self.frame_overlay.hide()
+        self.frame_overlay.raise_()
 
         self.connect_hide_overlay_on_click(self.open_file_button)
         self.connect_hide_overlay_on_click(self.play_button)
@@ -208,37 +314,40 @@ class MediaPlayer(QWidget):
     def _probe_video_with_cv2(self, filename: str):
         """
         Returns (width, height, fps) using OpenCV, or (None, None, None) on failure.
+        Videos probed before (same size and mtime) are answered from the probe cache.
         """
-        cap = cv2.VideoCapture(filename)
-        if not cap.isOpened():
-            cap.release()
+        info = self.probe_cache.probe(filename)
+        self.video_info = info
+        if info is None:
             return None, None, None
-
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        fps = cap.get(cv2.CAP_PROP_FPS)
-
-        cap.release()
-
-        if width <= 0 or height <= 0:
-            width, height = None, None
-
-        # Some files return 0.0 or NaN fps
-        try:
-            fps_val = float(fps)
-        except Exception:
-            fps_val = None
-
-        if fps_val is None or fps_val <= 1.0 or fps_val != fps_val:  # fps!=fps catches NaN
-            fps_val = None
-
-        return width, height, fps_val
+        return info["width"], info["height"], info["fps"]
 
     def open_file(self):
         filename, _ = QFileDialog.getOpenFileName(self, "Open Video")
-        if filename != '':
-            self.video_path = filename
-        if not filename:
+        if filename:
+            self.open_video(filename)
+
+    def open_project(self):
+        """
+        Lists every video under a directory, from its catalog, to open them from there.
+        """
+        root = QFileDialog.getExistingDirectory(self, "Open Project")
+        if not root:
+            return
+        self.close_project()
+        self.project_browser = ProjectBrowser(root, store=self.main_window.list_manager.store)
+        self.project_browser.video_selected.connect(self.open_video)
+        self.project_browser.show()
+
+    def close_project(self):
+        if self.project_browser is not None:
+            self.project_browser.close()
+            self.project_browser = None
+
+    @traced
+    def open_video(self, filename: str):
+        # Labels first: a label file that cannot be read keeps the current video open
+        if not self.load_labels(label_path_for(filename)):
             return
 
         # Probe with OpenCV FIRST (avoids Windows file-handle weirdness)
@@ -246,6 +355,7 @@ class MediaPlayer(QWidget):
 
         if width is not None and height is not None:
             self.video_widget.set_video_size(width, height)
+            self.live_markers.set_video_size(width, height)
             print(f"[cv2] Video size: {width} x {height}")
         else:
             print("[cv2] Could not read video size (click mapping may not work).")
@@ -256,31 +366,220 @@ class MediaPlayer(QWidget):
         else:
             print(f"[cv2] FPS unavailable/invalid; using default: {self.frame_rate}")
 
-        # Load into Qt player
+        # Frame timestamps from the sidecar, else scanned in the background when the frame rate
+        # does not give them (STE_PTS_SCAN=auto checks the first frames), or on the first frame step
+        self.stop_timestamp_scan()
+        self.timestamp_scan_started = False
+        self.timestamps = FrameTimestamps(self.frame_rate, load_timestamps(filename))
+        if self.timestamps.is_exact():
+            print(f"[cv2] Frame timestamps loaded: {len(self.timestamps)} frames")
+        elif self.timestamp_scan_mode == "auto":
+            self.start_timestamp_scan(filename, check_first=True)
+        elif self.timestamp_scan_mode == "open":
+            self.start_timestamp_scan(filename)
+
+        # Load into Qt player, the proxy if there is one and it is enabled
         self.video_path = filename
-        self.media_player.setMedia(QMediaContent(QUrl.fromLocalFile(filename)))
+        self.stop_proxy_generation()
+        self.proxy_file = None
+        self.leave_step_view(sync=False)
+        self.seeker.reset()
+        self.shown_frame = None
+        if self.use_proxy:
+            self.apply_proxy()
+        if self.proxy_file is None:
+            self.open_decoder(filename)
+            self.media_player.setMedia(QMediaContent(QUrl.fromLocalFile(filename)))
 
         self.play_button.setEnabled(True)
         self.prev_frame_button.setEnabled(True)
         self.next_frame_button.setEnabled(True)
+        self.live_markers_button.setEnabled(True)
+        self.step_buffer_button.setEnabled(True)
+        self.proxy_button.setEnabled(True)
         self.is_media_loaded = True
+        self.main_window.list_display.prefetch_selection()
 
-        # Labels.csv in same directory
-        self.path_label = os.path.join(os.path.dirname(filename), os.path.basename(filename).split('.')[0] + '.csv')
-        if not os.path.isfile(self.path_label):
+    def load_labels(self, path_label: str):
+        """
+        Loads the label csv of the video being opened, created empty if missing.
+        Returns False, with a warning, when it cannot be read.
+        """
+        # Fold the previous video's edit journal back into its csv
+        if self.path_label:
+            self.main_window.list_manager.compact_file(self.path_label, self.main_window.half)
+
+        if not os.path.isfile(path_label):
             tmp_df = pd.DataFrame(
-                columns=["frame", "team", "event", "minute", "second", "x_coord", "y_coord", "video_ms"]
+                columns=["frame", "team", "event", "minute", "second", "x", "y", "video_ms"]
             )
-            tmp_df.to_csv(self.path_label, index=False)
+            tmp_df.to_csv(path_label, index=False)
 
-        # Refresh list UI from CSV
-        self.main_window.list_manager.create_list_from_csv(self.path_label)
-        self.main_window.list_display.display_list(self.main_window.list_manager.create_text_list())
+        # Refresh list UI from CSV (the list view model is reset by the list manager)
+        try:
+            self.main_window.list_manager.create_list_from_csv(path_label)
+        except ValueError as error:
+            QMessageBox.warning(self, "Cannot open labels", str(error))
+            return False
+        self.path_label = path_label
+        return True
+
+    def open_decoder(self, filename: str):
+        # Keep one decoder open for review clicks instead of reopening the file each time
+        self.release_decoder()
+        self.decoder = VideoDecoder(filename, self.timestamps)
+        self.prefetcher = FramePrefetcher(self.decoder)
+        self.prefetcher.frame_ready.connect(self.frame_decoded)
+        # Frame stepping reads the same file with a capture of its own
+        self.stepper = FrameStepper(filename)
+
+    def start_timestamp_scan(self, filename: str, check_first: bool = False):
+        """
+        Scans the frame timestamps on a background thread. With check_first, only when the
+        first frames show that the frame rate does not give the exact frame times.
+        """
+        self.stop_timestamp_scan()
+        self.timestamp_scan_stop = threading.Event()
+        self.timestamp_scan_started = True
+        thread = threading.Thread(
+            target=self._scan_timestamps,
+            args=(filename, self.timestamp_scan_stop, self.frame_rate if check_first else None),
+            name="pts-scan",
+            daemon=True
+        )
+        thread.start()
+
+    def scan_timestamps_for_stepping(self):
+        # STE_PTS_SCAN=step: the scan starts with the first frame step of the video
+        if self.timestamp_scan_mode != "step" or self.timestamp_scan_started or self.timestamps.is_exact():
+            return
+        self.start_timestamp_scan(self.video_path)
+
+    def stop_timestamp_scan(self):
+        if self.timestamp_scan_stop is not None:
+            self.timestamp_scan_stop.set()
+            self.timestamp_scan_stop = None
+
+    def _scan_timestamps(self, filename: str, stop, check_fps=None):
+        """
+        Runs on the scan thread: reads every frame timestamp and caches it next to the video.
+        With check_fps, returns early when the first frames are check_fps apart.
+        """
+        lower_thread_priority()
+        if check_fps is not None and has_constant_frame_rate(filename, check_fps) is not False:
+            return
+        pts = scan_timestamps(filename, stop, load=self.timestamp_scan_load)
+        if pts is None:
+            return
+        save_timestamps(filename, pts)
+        self.timestamps_scanned.emit(filename, pts)
+
+    def set_scanned_timestamps(self, filename: str, pts):
+        if filename != self.video_path:
+            return
+        self.timestamps = FrameTimestamps(self.frame_rate, pts)
+        self.shown_frame = None
+        if self.decoder is not None:
+            self.decoder.timestamps = self.timestamps
+        print(f"[cv2] Frame timestamps scanned: {len(self.timestamps)} frames")
+
+    # -------------------------
+    # Proxy video
+    # -------------------------
+    def set_use_proxy(self, enabled: bool):
+        self.use_proxy = enabled
+        if not self.is_media_loaded:
+            return
+        if enabled:
+            self.apply_proxy()
+        else:
+            self.stop_proxy_generation()
+            self.proxy_button.setText("Proxy")
+            if self.proxy_file is not None:
+                self.proxy_file = None
+                self.play_source(self.video_path)
+
+    def apply_proxy(self):
+        """
+        Plays the cached proxy of the video, or starts transcoding it in the background.
+        """
+        proxy = load_proxy(self.video_path)
+        if proxy is not None:
+            self.proxy_button.setText("Proxy")
+            if proxy != self.proxy_file:
+                self.proxy_file = proxy
+                self.play_source(proxy)
+        elif proxy_unusable(self.video_path):
+            print("[proxy] Frames are not evenly spaced, playing the original video")
+        elif self.proxy_stop is None:
+            self.start_proxy_generation(self.video_path)
+
+    def play_source(self, filename: str):
+        """
+        Switches the player and the overlay decoder to the video or its proxy, keeping the position.
+        """
+        position = self.displayed_position() if self.is_media_loaded else 0
+        self.leave_step_view(sync=False)
+        playing = self.media_player.state() == QMediaPlayer.PlayingState
+        self.hide_frame_overlay()
+        self.open_decoder(filename)
+        self.seeker.reset()
+        self.media_player.setMedia(QMediaContent(QUrl.fromLocalFile(filename)))
+        if position:
+            self.seeker.seek(position)
+        if playing:
+            self.media_player.play()
+
+    def start_proxy_generation(self, filename: str):
+        self.proxy_stop = threading.Event()
+        self.proxy_button.setText("Proxy 0%")
+        thread = threading.Thread(
+            target=self._make_proxy,
+            args=(filename, self.proxy_stop),
+            name="proxy",
+            daemon=True
+        )
+        thread.start()
+
+    def stop_proxy_generation(self):
+        if self.proxy_stop is not None:
+            self.proxy_stop.set()
+            self.proxy_stop = None
+
+    def _make_proxy(self, filename: str, stop):
+        """
+        Runs on the proxy thread: transcodes the video next to it.
+        """
+        proxy, pts = make_proxy(filename, stop, lambda done: self.proxy_progress.emit(filename, int(done * 100)))
+        if stop.is_set():
+            return
+        self.proxy_ready.emit(filename, proxy, pts)
+
+    def show_proxy_progress(self, filename: str, percent: int):
+        if filename == self.video_path and self.proxy_stop is not None:
+            self.proxy_button.setText(f"Proxy {percent}%")
+
+    def set_proxy(self, filename: str, proxy, pts):
+        if filename != self.video_path:
+            return
+        self.proxy_stop = None
+        self.proxy_button.setText("Proxy")
+        # The transcode read every frame timestamp on the way
+        if pts is not None and not self.timestamps.is_exact():
+            self.stop_timestamp_scan()
+            self.set_scanned_timestamps(filename, pts)
+        if proxy is None:
+            print("[proxy] No proxy made, playing the original video")
+            return
+        print(f"[proxy] Proxy ready: {proxy}")
+        if self.use_proxy:
+            self.apply_proxy()
 
     # -------------------------
     # Playback controls
     # -------------------------
     def play_video(self):
+        self.leave_step_view()
         if self.media_player.state() == QMediaPlayer.PlayingState:
             self.media_player.pause()
         else:
@@ -292,46 +591,150 @@ class MediaPlayer(QWidget):
         else:
             self.play_button.setIcon(self.style().standardIcon(QStyle.SP_MediaPlay))
 
+    @traced
     def position_changed(self, position: int):
         """
         position is in milliseconds.
         """
-        self.slider.setValue(position)
-
-        # Guard FPS
-        fps = self.frame_rate if self.frame_rate and self.frame_rate > 1.0 else 30.0
-        frame = int(position / (1000.0 / fps))
-        self.frame_label.setText(f"Frame: {frame}")
+        self.ui_position = position
+        if self.ui_timer.isActive():
+            return
+        # Right away when the last refresh is old enough, else once the refresh interval is over
+        wait = self.position_ui_interval() - (time.perf_counter() - self.ui_updated_at) * 1000.0
+        if wait <= 0:
+            self.update_position_ui()
+        else:
+            self.ui_timer.start(int(wait) + 1)
+
+    def position_ui_interval(self) -> float:
+        if self.ui_interval_ms is None:
+            screen = QGuiApplication.primaryScreen()
+            rate = screen.refreshRate() if screen is not None else 0
+            self.ui_interval_ms = 1000.0 / rate if rate and rate > 1 else 1000.0 / 60
+        return self.ui_interval_ms
+
+    def update_position_ui(self):
+        self.ui_updated_at = time.perf_counter()
+        position = self.ui_position
+
+        # Leave the handle to the user while dragging
+        if not self.slider.isSliderDown() and self.slider.value() != position:
+            self.slider.setValue(position)
+
+        frame = self.timestamps.frame_at(position)
+        if self.step_index is not None:
+            # The stepped frame is shown, the player is catching up to it
+            return
+        if frame != self.shown_frame:
+            self.shown_frame = frame
+            self.frame_label.setText(f"Frame: {frame}")
+            self.refresh_live_markers(position)
 
     def duration_changed(self, duration: int):
         self.slider.setRange(0, duration)
 
     def set_position(self, position: int):
-        self.media_player.setPosition(position)
+        self.leave_step_view(sync=False)
+        self.seeker.seek(position)
 
     # -------------------------
     # Frame stepping
     # -------------------------
-    def _frame_duration_ms(self) -> float:
-        fps = self.frame_rate if self.frame_rate and self.frame_rate > 1.0 else 30.0
-        return 1000.0 / fps
+    def current_frame(self) -> int:
+        # Counted from a seek still pending, so held keys keep stepping from the latest target
+        if self.step_index is not None:
+            return self.step_index
+        return self.timestamps.frame_at(self.seeker.position())
+
+    def displayed_position(self) -> int:
+        """
+        Video time in ms of the frame on screen, the stepped frame while stepping.
+        """
+        if self.step_index is not None:
+            return self.timestamps.position_of(self.step_index)
+        return self.media_player.position()
 
     def previous_frame(self):
         if not self.is_media_loaded:
             return
-        current = float(self.media_player.position())
-        step = self._frame_duration_ms()
-        new_pos = max(current - step, 0.0)
-        self.media_player.setPosition(int(new_pos))
+        self.scan_timestamps_for_stepping()
+        frame = self.current_frame()
+        if frame <= 0:
+            return
+        if not self.step_to(frame - 1):
+            self.seeker.seek(self.timestamps.position_of(frame - 1))
 
     def next_frame(self):
         if not self.is_media_loaded:
             return
-        current = float(self.media_player.position())
-        step = self._frame_duration_ms()
-        dur = float(self.media_player.duration())
-        new_pos = min(current + step, dur)
-        self.media_player.setPosition(int(new_pos))
+        self.scan_timestamps_for_stepping()
+        frame = self.current_frame()
+        if self.timestamps.is_exact() and frame >= len(self.timestamps) - 1:
+            return
+        new_pos = self.timestamps.position_of(frame + 1)
+        if new_pos <= self.media_player.duration():
+            if not self.step_to(frame + 1):
+                self.seeker.seek(new_pos)
+
+    def set_step_buffer(self, enabled: bool):
+        self.step_buffer_enabled = enabled
+        if not enabled:
+            self.leave_step_view()
+            if self.stepper is not None:
+                # Give the buffered frames back
+                self.stepper.release()
+
+    def step_to(self, index: int) -> bool:
+        """
+        Shows frame index decoded through the step buffer. False when the player should seek
+        instead: the step buffer is off, the video plays, or the frame could not be decoded.
+        """
+        if not self.step_buffer_enabled or self.stepper is None:
+            return False
+        if self.media_player.state() == QMediaPlayer.PlayingState:
+            return False
+        frame = self.stepper.frame_at(index)
+        if frame is None:
+            self.leave_step_view(sync=False)
+            return False
+
+        self.step_index = index
+        self.step_view.setGeometry(self.video_widget.geometry())
+        video_size = None
+        if self.video_widget.video_width > 0 and self.video_widget.video_height > 0:
+            video_size = (self.video_widget.video_width, self.video_widget.video_height)
+        self.step_view.set_frame(frame, video_size)
+        if not self.step_view.isVisible():
+            self.step_view.show()
+            self.step_view.stackUnder(self.live_markers)
+
+        position = self.timestamps.position_of(index)
+        if not self.slider.isSliderDown():
+            self.slider.setValue(position)
+        self.shown_frame = index
+        self.frame_label.setText(f"Frame: {index}")
+        self.refresh_live_markers(position)
+        self.step_timer.start(self.step_sync_delay)
+        return True
+
+    def sync_step_position(self):
+        # The player seeks once to where the stepping stopped; the stepped frame stays shown
+        if self.step_index is not None:
+            self.seeker.seek(self.timestamps.position_of(self.step_index))
+
+    def leave_step_view(self, sync=True):
+        """
+        Hands the display back to the player, seeking it to the stepped frame unless sync is False.
+        """
+        self.step_timer.stop()
+        if self.step_index is None:
+            return
+        if sync:
+            self.sync_step_position()
+        self.step_index = None
+        self.shown_frame = None
+        self.step_view.hide()
+        self.step_view.clear()
 
     # -------------------------
     # Optional: debug click on container widget
@@ -349,15 +752,84 @@ class MediaPlayer(QWidget):
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
-        # match the overlay label to the video widget area
-        self.frame_overlay_label.setGeometry(self.video_widget.geometry())
+        # match the overlays to the video widget area, they re-render at the new size
+        self.frame_overlay.setGeometry(self.video_widget.geometry())
+        self.step_view.setGeometry(self.video_widget.geometry())
+        self.live_markers.setGeometry(self.video_widget.geometry())
+
+    def set_live_markers(self, enabled: bool):
+        self.live_markers_enabled = enabled
+        # Position updates about once per frame while markers follow the playback
+        self.media_player.setNotifyInterval(max(20, int(1000 / self.timestamps.fps)) if enabled else 1000)
+        if enabled:
+            self.live_markers.setGeometry(self.video_widget.geometry())
+            self.live_markers.show()
+            self.live_markers.stackUnder(self.frame_overlay)
+            self.refresh_live_markers()
+        else:
+            self.live_markers.hide()
+            self.live_markers.clear()
+
+    def refresh_live_markers(self, position=None):
+        """
+        position : video time in ms, the player position by default
+        Two bisects into the time-sorted event index, then only the events in the window are read.
+        """
+        if not self.live_markers_enabled or not self.is_media_loaded:
+            return
+        if position is None:
+            position = self.displayed_position()
+        frame = self.timestamps.frame_at(position)
+        radius = self.live_marker_radius
+        # The ms window may be a little wide at the end of the video, the frames decide
+        start_ms = self.timestamps.position_of(max(0, frame - radius))
+        end_ms = self.timestamps.position_of(frame + radius + 1)
+        markers = [
+            (event.x_coord, event.y_coord)
+            for event in self.main_window.list_manager.events_between(start_ms, end_ms)
+            if abs(event.frame - frame) <= radius and event.x_coord >= 0 and event.y_coord >= 0
+        ]
+        if markers != self.live_markers.markers:
+            self.live_markers.set_markers(markers)
+
+    # ListManager listener, edits update the live markers
+    def begin_reset(self):
+        pass
+
+    def end_reset(self):
+        self.refresh_live_markers()
+
+    def begin_insert(self, row):
+        pass
+
+    def end_insert(self, row):
+        self.refresh_live_markers()
+
+    def begin_remove(self, row):
+        pass
+
+    def end_remove(self, row):
+        self.refresh_live_markers()
+
+    def release_decoder(self):
+        if self.prefetcher is not None:
+            self.prefetcher.stop()
+            self.prefetcher = None
+        self.pending_overlay = None
+        if self.decoder is not None:
+            self.decoder.release()
+            self.decoder = None
+        if self.stepper is not None:
+            self.stepper.release()
+            self.stepper = None
 
     def hide_frame_overlay(self):
-        label = getattr(self, "frame_overlay_label", None)
-        if label is None:
+        self.pending_overlay = None
+        overlay = getattr(self, "frame_overlay", None)
+        if overlay is None:
             return
-        label.hide()
-        label.clear()
+        overlay.hide()
+        overlay.clear()
 
     def connect_hide_overlay_on_click(self, widget):
         """
@@ -366,80 +838,66 @@ class MediaPlayer(QWidget):
         if hasattr(widget, "clicked"):
             widget.clicked.connect(self.hide_frame_overlay)
 
+    @traced
     def show_painted_frame_overlay(self, position_ms: int, frame_x: int, frame_y: int):
         """
         position_ms : video time in ms
         frame_x, frame_y : coordinates in *frame pixel coordinates*
         """
 
-        if not self.video_path:
+        if not self.video_path or self.decoder is None:
             return
 
-        # --- OpenCV: read frame at position ---
-        cap = cv2.VideoCapture(self.video_path)
-        if not cap.isOpened():
-            print("OpenCV failed to open video for overlay")
+        # --- OpenCV: frame at position, decoded off the GUI thread if not cached yet ---
+        index = self.decoder.frame_index(position_ms)
+        frame = self.decoder.peek(index)
+
+        if frame is None:
+            self.pending_overlay = (index, frame_x, frame_y)
+            self.prefetcher.request_first(index)
             return
 
-        cap.set(cv2.CAP_PROP_POS_MSEC, float(position_ms))
-        ok, frame = cap.read()
-        cap.release()
+        self.paint_frame_overlay(frame, frame_x, frame_y)
 
-        if not ok or frame is None:
+    def prefetch_positions(self, positions):
+        """
+        positions : video times in ms, most important first
+        Only as many frames as fit in the decoder cache are requested.
+        """
+        if self.prefetcher is None:
+            return
+        indices = [self.decoder.frame_index(position) for position in positions]
+        self.prefetcher.request(indices[:self.decoder.capacity_frames()])
+
+    @traced
+    def frame_decoded(self, index):
+        if self.pending_overlay is None or self.pending_overlay[0] != index:
+            return
+        _, frame_x, frame_y = self.pending_overlay
+        self.pending_overlay = None
+
+        frame = self.decoder.peek(index)
+        if frame is None:
             print("OpenCV failed to read frame for overlay")
             return
 
-        # --- Draw cross in FRAME coordinates (BGR) ---
+        self.paint_frame_overlay(frame, frame_x, frame_y)
+
+    @traced
+    def paint_frame_overlay(self, frame, frame_x: int, frame_y: int):
+        # The frame is shared with the decoder cache, the overlay only reads it.
+        # Coordinates are full-resolution pixels, also when the frame comes from the proxy
         h, w = frame.shape[:2]
+        if self.video_widget.video_width > 0 and self.video_widget.video_height > 0:
+            w, h = self.video_widget.video_width, self.video_widget.video_height
+        video_size = (w, h)
         x = int(frame_x)
         y = int(frame_y)
-
-        if 0 <= x < w and 0 <= y < h:
-            size = 5
-            thickness = 1
-            color = (0, 0, 255)  # red (BGR)
-
-            cv2.line(frame, (x - size, y), (x + size, y), color, thickness)
-            cv2.line(frame, (x, y - size), (x, y + size), color, thickness)
-
-        # --- Convert BGR -> RGB ---
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-        # --- MATCH QVideoWidget (KeepAspectRatio + centering) ---
-        video_widget = self.video_widget
-        widget_w = video_widget.width()
-        widget_h = video_widget.height()
-
-        fh, fw = frame_rgb.shape[:2]
-
-        scale = min(widget_w / fw, widget_h / fh)
-        scaled_w = int(fw * scale)
-        scaled_h = int(fh * scale)
-
-        resized = cv2.resize(frame_rgb, (scaled_w, scaled_h), interpolation=cv2.INTER_LINEAR)
-
-        # Black padded canvas (black bars)
-        canvas = np.zeros((widget_h, widget_w, 3), dtype=np.uint8)
-
-        x0 = (widget_w - scaled_w) // 2
-        y0 = (widget_h - scaled_h) // 2
-
-        canvas[y0:y0 + scaled_h, x0:x0 + scaled_w] = resized
-
-        # --- Convert to QPixmap ---
-        bytes_per_line = 3 * widget_w
-        qimg = QImage(
-            canvas.data,
-            widget_w,
-            widget_h,
-            bytes_per_line,
-            QImage.Format_RGB888
-        )
-
-        pix = QPixmap.fromImage(qimg)
-
-        # --- Show overlay exactly on top of the video ---
-        self.frame_overlay_label.setGeometry(video_widget.geometry())
-        self.frame_overlay_label.setPixmap(pix)
-        self.frame_overlay_label.show()
-        self.frame_overlay_label.raise_()
+        markers = [(x, y)] if 0 <= x < w and 0 <= y < h else []
+
+        # --- Show overlay exactly on top of the video (KeepAspectRatio + centering) ---
+        self.frame_overlay.setGeometry(self.video_widget.geometry())
+        self.frame_overlay.set_frame(frame, video_size)
+        self.frame_overlay.set_markers(markers)
+        self.frame_overlay.show()
+        self.frame_overlay.raise_()
@@ -0,0 +1,212 @@
+import os
+import sqlite3
+import threading
+import time
+
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QLineEdit,
+    QTableView, QAbstractItemView, QHeaderView
+)
+from PyQt5.QtCore import Qt, QEvent, QAbstractTableModel, QModelIndex, QSortFilterProxyModel, pyqtSignal
+
+from utils.project_catalog import ProjectCatalog, annotation_progress
+
+# Role returning the raw value of a cell, used for sorting
+SortRole = Qt.UserRole
+# Role returning the absolute video path of a row
+VideoRole = Qt.UserRole + 1
+
+
+def format_duration(ms):
+    if not ms:
+        return ""
+    seconds = int(ms // 1000)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+class CatalogModel(QAbstractTableModel):
+    """
+    Rows of the project catalog, one per video.
+    """
+    columns = ["Video", "Resolution", "FPS", "Duration", "Events", "Progress", "Labels modified"]
+
+    def __init__(self):
+        super().__init__()
+        self.entries = []
+
+    def set_entries(self, entries):
+        self.beginResetModel()
+        self.entries = entries
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.entries)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.columns[section]
+        return None
+
+    def values(self, entry):
+        """
+        (display text, sort value) of every column.
+        """
+        progress = annotation_progress(entry)
+        modified = entry["label_mtime_ns"]
+        return [
+            (entry["path"], entry["path"]),
+            (f"{entry['width']} x {entry['height']}" if entry["width"] else "", (entry["width"] or 0) * (entry["height"] or 0)),
+            (f"{entry['fps']:.2f}" if entry["fps"] else "", entry["fps"] or 0.0),
+            (format_duration(entry["duration_ms"]), entry["duration_ms"] or 0.0),
+            ("?" if entry["events"] is None else str(entry["events"]), -1 if entry["events"] is None else entry["events"]),
+            ("" if progress is None else f"{progress:.0%}", -1.0 if progress is None else progress),
+            (time.strftime("%Y-%m-%d %H:%M", time.localtime(modified / 1e9)) if modified else "", modified or 0),
+        ]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self.entries[index.row()]
+        if role == VideoRole:
+            return entry["video"]
+        if role == Qt.DisplayRole:
+            return self.values(entry)[index.column()][0]
+        if role == SortRole:
+            return self.values(entry)[index.column()][1]
+        if role == Qt.TextAlignmentRole and index.column() > 0:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+
+class ProjectBrowser(QWidget):
+    """
+    Window listing every video of a project directory from its catalog.
+    - The catalog is shown as stored, then rescanned in the background; only new or changed
+      videos and label files are read again. Coming back to the window rescans, so labels
+      edited meanwhile show up
+    - video_selected(path) is emitted on double-click
+    - With the label database (store), its matches are counted from it rather than from their csv
+    """
+    video_selected = pyqtSignal(str)
+    # (counts or None) from the scan thread
+    scan_finished = pyqtSignal(object)
+    scan_progress = pyqtSignal(int)
+
+    def __init__(self, root, parent=None, store=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Project: {root}")
+        self.resize(900, 600)
+        self.catalog = ProjectCatalog(root, store=store)
+        self.scan_stop = None
+
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("Filter videos")
+        self.rescan_button = QPushButton("Rescan")
+        self.rescan_button.clicked.connect(self.start_scan)
+        self.summary_label = QLabel()
+        self.status_label = QLabel()
+
+        self.model = CatalogModel()
+        self.proxy = QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setSortRole(SortRole)
+        self.proxy.setFilterKeyColumn(0)
+        self.proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        self.filter_edit.textChanged.connect(self.proxy.setFilterFixedString)
+
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(0, Qt.AscendingOrder)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().hide()
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.doubleClicked.connect(self.open_selected)
+
+        top = QHBoxLayout()
+        top.addWidget(self.filter_edit)
+        top.addWidget(self.rescan_button)
+        bottom = QHBoxLayout()
+        bottom.addWidget(self.summary_label)
+        bottom.addStretch()
+        bottom.addWidget(self.status_label)
+        layout = QVBoxLayout(self)
+        layout.addLayout(top)
+        layout.addWidget(self.table)
+        layout.addLayout(bottom)
+
+        self.scan_finished.connect(self.scan_done)
+        self.scan_progress.connect(self.show_scan_progress)
+
+        self.reload()
+        self.start_scan()
+
+    def reload(self):
+        entries = self.catalog.rows()
+        self.model.set_entries(entries)
+        annotated = sum(1 for entry in entries if entry["events"])
+        events = sum(entry["events"] or 0 for entry in entries)
+        self.summary_label.setText(f"{len(entries)} videos, {annotated} annotated, {events} events")
+
+    def start_scan(self):
+        if self.scan_stop is not None:
+            return
+        self.scan_stop = threading.Event()
+        self.rescan_button.setEnabled(False)
+        self.status_label.setText("Scanning...")
+        thread = threading.Thread(target=self._scan, args=(self.scan_stop,), name="catalog-scan", daemon=True)
+        thread.start()
+
+    def stop_scan(self):
+        if self.scan_stop is not None:
+            self.scan_stop.set()
+            self.scan_stop = None
+
+    def _scan(self, stop):
+        """
+        Runs on the scan thread.
+        """
+        try:
+            counts = self.catalog.scan(stop, progress=self.scan_progress.emit)
+        except (OSError, sqlite3.Error) as error:
+            print(f"Could not scan the project: {error}")
+            counts = None
+        if not stop.is_set():
+            self.scan_finished.emit(counts)
+
+    def show_scan_progress(self, videos):
+        if self.scan_stop is not None:
+            self.status_label.setText(f"Scanning... {videos} videos")
+
+    def scan_done(self, counts):
+        self.scan_stop = None
+        self.rescan_button.setEnabled(True)
+        if counts is None:
+            self.status_label.setText("")
+            return
+        status = f"Scanned: {counts['probed']} videos probed, {counts['labels_read']} label files read"
+        if counts["errors"]:
+            status += f", {len(counts['errors'])} unreadable"
+        self.status_label.setText(status)
+        # The unreadable label files and why, on hover
+        self.status_label.setToolTip("\n".join(counts["errors"]))
+        if counts["probed"] or counts["labels_read"] or counts["removed"] or self.model.rowCount() != counts["videos"]:
+            self.reload()
+
+    def open_selected(self, index):
+        path = index.data(VideoRole)
+        if path and os.path.isfile(path):
+            self.video_selected.emit(path)
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.ActivationChange and self.isActiveWindow():
+            self.start_scan()
+
+    def closeEvent(self, event):
+        self.stop_scan()
+        super().closeEvent(event)
@@ -0,0 +1,84 @@
+import time
+
+from PyQt5.QtCore import QObject, QTimer
+
+
+class SeekScheduler(QObject):
+    """
+    Coalesces seeks on a QMediaPlayer for held arrow keys and slider drags.
+    - At most one seek is in flight, requests arriving meanwhile only replace the pending target
+    - A seek counts as done at the next positionChanged, or after max_wait ms without one
+    - The time seeks take is tracked as a moving average, and seeks are sent no closer
+      together than that, so the backend never queues more than it can complete
+    """
+
+    def __init__(self, player, min_interval=15, max_wait=250):
+        super().__init__()
+        self.player = player
+        self.min_interval = min_interval
+        self.max_wait = max_wait
+        # Latest requested position not sent yet
+        self.pending = None
+        # Position of the seek in flight
+        self.target = None
+        self.in_flight = False
+        self.sent_at = 0.0
+        self.latency_ms = float(min_interval)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.timeout)
+        self.player.positionChanged.connect(self.position_changed)
+
+    def seek(self, position):
+        self.pending = position
+        if not self.in_flight and not self.timer.isActive():
+            self.dispatch()
+
+    def position(self):
+        """
+        Where the player is going: the latest target while seeking, else its current position.
+        """
+        if self.pending is not None:
+            return self.pending
+        if self.in_flight:
+            return self.target
+        return self.player.position()
+
+    def reset(self):
+        self.pending = None
+        self.in_flight = False
+        self.timer.stop()
+
+    def dispatch(self):
+        if self.pending is None:
+            return
+        self.target, self.pending = self.pending, None
+        self.in_flight = True
+        self.sent_at = time.perf_counter()
+        self.timer.start(self.max_wait)
+        self.player.setPosition(self.target)
+
+    def completed(self, elapsed_ms):
+        self.in_flight = False
+        self.latency_ms = 0.8 * self.latency_ms + 0.2 * elapsed_ms
+        if self.pending is None:
+            self.timer.stop()
+            return
+        # Space seeks by the observed latency, counted from when the last one was sent
+        wait = max(self.min_interval, self.latency_ms) - elapsed_ms
+        if wait <= 0:
+            self.dispatch()
+        else:
+            self.timer.start(int(wait))
+
+    def position_changed(self, position):
+        if self.in_flight:
+            self.completed((time.perf_counter() - self.sent_at) * 1000.0)
+
+    def timeout(self):
+        if self.in_flight:
+            # No position update from the backend, give up waiting for it
+            self.completed(float(self.max_wait))
+        else:
+            self.dispatch()
@@ -1,10 +1,16 @@
 import sys
-from PyQt5.QtWidgets import QApplication
+from utils.startup_timing import startup_timer
 
-from interface.main_window import MainWindow
+with startup_timer.section("import PyQt5.QtWidgets"):
+	from PyQt5.QtWidgets import QApplication
+
+with startup_timer.section("import interface.main_window"):
+	from interface.main_window import MainWindow
 
 if __name__ == "__main__":
 
-	application = QApplication(sys.argv)
-	window = MainWindow()
+	with startup_timer.section("QApplication"):
+		application = QApplication(sys.argv)
+	with startup_timer.section("MainWindow"):
+		window = MainWindow()
 	sys.exit(application.exec_())
\ No newline at end of file
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the modules of the tool the way main.py does, from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def video_path(tmp_path):
+	# 50 frames at 25 fps, frame i filled with the gray level 5 * i
+	cv2 = pytest.importorskip("cv2")
+	np = pytest.importorskip("numpy")
+	path = str(tmp_path / "video.avi")
+	writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 25.0, (64, 48))
+	for index in range(50):
+		writer.write(np.full((48, 64, 3), index * 5, dtype=np.uint8))
+	writer.release()
+	return path
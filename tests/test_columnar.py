@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+from utils.event_class import Event
+from utils.list_management import ListManager
+
+pytest.importorskip("pyarrow")
+
+CSV = "frame,team,event,minute,second,x,y,video_ms\n" \
+	"25,home,pass,0,1.0,10,20,1000\n" \
+	"50,away,out,0,2.0,,,2000\n"
+
+def export(tmp_path, extension):
+	# Path of the test labels exported as extension
+	label_path = str(tmp_path / "match.csv")
+	with open(label_path, 'w') as file:
+		file.write(CSV)
+	manager = ListManager()
+	manager.create_list_from_csv(label_path)
+	path = str(tmp_path / ("match" + extension))
+	manager.export_columnar(path)
+	return path
+
+@pytest.mark.parametrize("extension", [".parquet", ".arrow"])
+def test_empty_coordinates_round_trip(tmp_path, extension):
+
+	path = export(tmp_path, extension)
+
+	exported = ListManager()
+	exported.create_list_from_csv(path)
+	assert [(event.x_coord, event.y_coord) for event in exported.event_list] == [(-1, -1), (10, 20)]
+
+def test_loaded_arrow_file_is_not_mapped(tmp_path):
+
+	path = export(tmp_path, ".arrow")
+	manager = ListManager()
+	manager.create_list_from_csv(path)
+	if os.path.isfile("/proc/self/maps"):
+		with open("/proc/self/maps") as maps:
+			assert path not in maps.read()
+
+	# Compacted over the file it was loaded from
+	manager.add_event(Event(75, "home", "cross", 0, 3.0, 50, 60, 3000))
+	manager.compact_file(path, 1)
+	reloaded = ListManager()
+	reloaded.create_list_from_csv(path)
+	assert [event.event for event in reloaded.event_list] == ["cross", "out", "pass"]
+
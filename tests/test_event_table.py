@@ -0,0 +1,41 @@
+import pytest
+
+from utils.event_table import read_event_table
+from utils.list_management import ListManager
+
+HEADER = "frame,team,event,minute,second,x,y,video_ms\n"
+
+def write(tmp_path, rows):
+
+	path = str(tmp_path / "match.csv")
+	with open(path, 'w') as file:
+		file.write(HEADER + rows)
+	return path
+
+def test_empty_frame_is_an_error(tmp_path):
+
+	path = write(tmp_path, "25,home,pass,0,1.0,10,20,1000\n,away,shot,0,2.0,30,40,2000\n")
+	with pytest.raises(ValueError, match="empty frame on line 3"):
+		read_event_table(path)
+
+def test_empty_video_ms_is_an_error(tmp_path):
+
+	path = write(tmp_path, "25,home,pass,0,1.0,10,20,\n")
+	with pytest.raises(ValueError, match="empty video_ms on line 2"):
+		read_event_table(path)
+
+def test_failed_load_keeps_the_list(tmp_path):
+
+	manager = ListManager()
+	manager.create_list_from_csv(write(tmp_path, "25,home,pass,0,1.0,10,20,1000\n"))
+	broken = str(tmp_path / "broken.csv")
+	with open(broken, 'w') as file:
+		file.write(HEADER + ",home,pass,0,1.0,10,20,1000\n")
+	with pytest.raises(ValueError):
+		manager.create_list_from_csv(broken)
+	assert [event.event for event in manager.event_list] == ["pass"]
+
+def test_empty_names_and_coordinates(tmp_path):
+
+	event = read_event_table(write(tmp_path, "25,,,0,1.0,,,1000\n")).event(0)
+	assert (event.team, event.event, event.x_coord, event.y_coord) == ("", "", -1, -1)
@@ -0,0 +1,30 @@
+from utils.frame_ring import FrameStepper
+
+FRAME_BYTES = 64 * 48 * 3
+
+def frame_number(frame):
+	# Inverse of the gray level of the test video
+	return int(round(frame.mean() / 5))
+
+def test_forward_step_after_back_fill_keeps_ring(video_path):
+
+	stepper = FrameStepper(video_path, buffer_bytes=FRAME_BYTES * 40, back_fill=10)
+	assert frame_number(stepper.frame_at(30)) == 30
+	assert frame_number(stepper.frame_at(31)) == 31
+	assert frame_number(stepper.frame_at(20)) == 20
+	assert (stepper.ring.first, stepper.ring.end) == (20, 32)
+
+	# Continues from the end of the ring instead of seeking and dropping the back-filled frames
+	assert frame_number(stepper.frame_at(32)) == 32
+	assert (stepper.ring.first, stepper.ring.end) == (20, 33)
+	assert [frame_number(stepper.frame_at(index)) for index in range(20, 33)] == list(range(20, 33))
+	stepper.release()
+
+def test_back_steps_are_served_from_ring(video_path):
+
+	stepper = FrameStepper(video_path, buffer_bytes=FRAME_BYTES * 40, back_fill=10)
+	stepper.frame_at(10)
+	first = stepper.ring.first
+	assert [frame_number(stepper.frame_at(index)) for index in range(10, first - 1, -1)] == list(range(10, first - 1, -1))
+	assert stepper.ring.first == first
+	stepper.release()
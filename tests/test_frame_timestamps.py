@@ -0,0 +1,28 @@
+import threading
+
+from utils.frame_timestamps import FrameTimestamps, timestamp_scan_mode, has_constant_frame_rate, scan_timestamps
+
+def test_scan_mode():
+
+	assert timestamp_scan_mode({}) == "auto"
+	assert timestamp_scan_mode({"STE_PTS_SCAN": " Step "}) == "step"
+	assert timestamp_scan_mode({"STE_PTS_SCAN": "sometimes"}) == "auto"
+
+def test_constant_frame_rate(video_path, tmp_path):
+
+	assert has_constant_frame_rate(video_path, 25.0) is True
+	assert has_constant_frame_rate(video_path, 30.0) is False
+	assert has_constant_frame_rate(str(tmp_path / "missing.avi"), 25.0) is None
+
+def test_throttled_scan_matches_frame_rate(video_path):
+
+	pts = scan_timestamps(video_path, load=0.5, chunk=10)
+	assert len(pts) == 50
+	timestamps = FrameTimestamps(25.0, pts)
+	assert [timestamps.position_of(frame) for frame in (0, 1, 49)] == [0, 40, 1960]
+
+def test_stopped_scan(video_path):
+
+	stop = threading.Event()
+	stop.set()
+	assert scan_timestamps(video_path, stop, load=0.5) is None
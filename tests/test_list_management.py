@@ -0,0 +1,163 @@
+import glob
+import os
+import shutil
+
+import pytest
+
+from utils import list_management
+from utils.event_class import Event
+from utils.event_filter import EventFilter
+from utils.event_index import ID_MASK
+from utils.journal import AnnotationJournal, journal_path
+from utils.label_writer import LabelWriter
+from utils.list_management import ListManager
+
+CSV = "frame,team,event,minute,second,x,y,video_ms\n" \
+	"25,home,pass,0,1.0,10,20,1000\n" \
+	"50,away,shot,0,2.0,30,40,2000\n"
+
+@pytest.fixture
+def label_path(tmp_path):
+
+	path = str(tmp_path / "match.csv")
+	with open(path, 'w') as file:
+		file.write(CSV)
+	return path
+
+def edited_manager(path):
+	# Two journaled edits: one event added, one deleted
+	manager = ListManager()
+	manager.create_list_from_csv(path)
+	manager.add_event(Event(75, "home", "cross", 0, 3.0, 50, 60, 3000))
+	manager.delete_event(manager.events[0].event_id)
+	manager.save_file(path, 1)
+	return manager
+
+def loaded_texts(path):
+
+	manager = ListManager()
+	manager.create_list_from_csv(path)
+	return sorted(event.to_text() for event in manager.event_list)
+
+def test_journal_is_replayed(label_path):
+
+	expected = sorted(event.to_text() for event in edited_manager(label_path).event_list)
+	assert os.path.isfile(journal_path(label_path))
+	assert loaded_texts(label_path) == expected
+
+def test_crash_after_csv_written_does_not_replay_journal_twice(label_path, monkeypatch):
+
+	manager = edited_manager(label_path)
+	expected = sorted(event.to_text() for event in manager.event_list)
+
+	def crash(self):
+		raise OSError("crash before the journal is removed")
+	monkeypatch.setattr(AnnotationJournal, "clear", crash)
+	with pytest.raises(OSError):
+		manager.compact_file(label_path, 1)
+	monkeypatch.undo()
+
+	# The csv already has the edits, the leftover journal must not add them again
+	assert os.path.isfile(journal_path(label_path))
+	assert loaded_texts(label_path) == expected
+	assert not os.path.isfile(journal_path(label_path))
+	# Set aside, not deleted
+	assert len(glob.glob(journal_path(label_path) + ".*.stale")) == 1
+
+def test_crash_before_csv_written_keeps_journal(label_path, monkeypatch):
+
+	manager = edited_manager(label_path)
+	expected = sorted(event.to_text() for event in manager.event_list)
+
+	def crash(path, df):
+		raise OSError("crash before the csv is replaced")
+	monkeypatch.setattr(list_management, "write_label_csv", crash)
+	with pytest.raises(OSError):
+		manager.compact_file(label_path, 1)
+	monkeypatch.undo()
+
+	assert loaded_texts(label_path) == expected
+
+def test_journal_of_copied_folder_is_replayed(label_path, tmp_path_factory):
+
+	expected = sorted(event.to_text() for event in edited_manager(label_path).event_list)
+	# Like a backup on another disk: new inodes, same content and mtimes
+	copy = shutil.copytree(os.path.dirname(label_path), str(tmp_path_factory.mktemp("backup") / "match"))
+	assert loaded_texts(os.path.join(copy, "match.csv")) == expected
+
+def test_journal_of_touched_label_file_is_replayed(label_path):
+
+	expected = sorted(event.to_text() for event in edited_manager(label_path).event_list)
+	os.utime(label_path, ns=(0, 0))
+	assert loaded_texts(label_path) == expected
+	assert os.path.isfile(journal_path(label_path))
+
+def test_edits_after_compaction_are_replayed(label_path):
+
+	manager = edited_manager(label_path)
+	manager.compact_file(label_path, 1)
+	manager.add_event(Event(100, "away", "carry", 0, 4.0, 1, 2, 4000))
+	manager.save_file(label_path, 1)
+	expected = sorted(event.to_text() for event in manager.event_list)
+	assert loaded_texts(label_path) == expected
+
+class Recorder:
+# Listener keeping the names of the notifications
+
+	def __init__(self):
+
+		self.calls = list()
+
+	def __getattr__(self, name):
+
+		return lambda *args: self.calls.append(name)
+
+def test_sort_list_resets_views_and_filter_index(label_path):
+
+	manager = ListManager()
+	manager.create_list_from_csv(label_path)
+	home = EventFilter(team="home")
+	manager.filter_keys(home)
+	recorder = Recorder()
+	manager.add_listener(recorder)
+
+	manager.sort_list()
+	assert recorder.calls == []
+
+	manager.events.keys.reverse()
+	manager.sort_list()
+	assert recorder.calls == ["begin_reset", "end_reset"]
+	assert [event.position for event in manager.event_list] == [2000, 1000]
+	assert [manager.events.get(key & ID_MASK).team for key in manager.filter_keys(home)] == ["home"]
+
+def locked(path, df):
+	# Like a csv held open by a spreadsheet on Windows
+	raise PermissionError("the file is in use")
+
+@pytest.mark.parametrize("with_writer", [False, True])
+def test_failed_compaction_keeps_edits(label_path, monkeypatch, with_writer):
+
+	manager = ListManager()
+	errors = list()
+	if with_writer:
+		# Long delay: the saved edit is still queued when the compaction is submitted
+		manager.writer = LabelWriter(on_error=errors.append, delay=60.0)
+	manager.create_list_from_csv(label_path)
+	manager.add_event(Event(75, "home", "cross", 0, 3.0, 50, 60, 3000))
+	manager.save_file(label_path, 1)
+	# Still pending when the compaction starts
+	manager.add_event(Event(100, "away", "corner", 0, 4.0, 70, 80, 4000))
+	expected = sorted(event.to_text() for event in manager.event_list)
+
+	monkeypatch.setattr(list_management, "write_label_csv", locked)
+	if with_writer:
+		manager.compact_file(label_path, 1)
+		manager.writer.close()
+		assert len(errors) == 1
+	else:
+		with pytest.raises(PermissionError):
+			manager.compact_file(label_path, 1)
+	monkeypatch.undo()
+
+	assert loaded_texts(label_path) == expected
+
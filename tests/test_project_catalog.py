@@ -0,0 +1,53 @@
+import os
+
+from utils.event_class import Event
+from utils.label_batch import find_label_files
+from utils.media_paths import label_path_for
+from utils.list_management import ListManager
+from utils.project_catalog import ProjectCatalog
+from utils.sqlite_store import SqliteStore
+
+CSV = "frame,team,event,minute,second,x,y,video_ms\n" \
+	"25,home,pass,0,1.0,10,20,1000\n"
+
+def write(path, text):
+
+	with open(path, 'w') as file:
+		file.write(text)
+	return path
+
+def test_stored_matches_are_counted_from_the_database(tmp_path, video_path):
+
+	label = write(label_path_for(video_path), CSV)
+	store = SqliteStore(str(tmp_path / "labels.sqlite3"))
+	catalog = ProjectCatalog(str(tmp_path), store=store)
+	manager = ListManager()
+	manager.store = store
+	manager.create_list_from_csv(label)
+	catalog.scan()
+	assert [entry["events"] for entry in catalog.rows()] == [1]
+
+	# Saved to the database only, the csv is unchanged
+	manager.add_event(Event(50, "away", "shot", 0, 2.0, 30, 40, 2000))
+	manager.save_file(label, 1)
+	assert catalog.scan()["labels_read"] == 1
+	assert [(entry["events"], entry["last_event_ms"]) for entry in catalog.rows()] == [(2, 2000)]
+	assert catalog.scan()["labels_read"] == 0
+	store.close()
+
+def test_unreadable_label_file_is_reported_in_counts(tmp_path, video_path, capsys):
+
+	write(label_path_for(video_path), "frame,team\n1,home\n")
+	counts = ProjectCatalog(str(tmp_path)).scan()
+	assert len(counts["errors"]) == 1 and counts["errors"][0].startswith("video.csv: ")
+	assert [entry["events"] for entry in ProjectCatalog(str(tmp_path)).rows()] == [None]
+	assert capsys.readouterr().out == ""
+
+def test_only_label_csv_files_are_found(tmp_path):
+
+	label = write(str(tmp_path / "match.csv"), CSV)
+	legacy = write(str(tmp_path / "old.csv"), "frame,team,event,minute,second,x_coord,y_coord,video_ms\n")
+	write(str(tmp_path / "roster.csv"), "name,number\nA,1\n")
+	os.makedirs(str(tmp_path / "notes"))
+	write(str(tmp_path / "notes" / "empty.csv"), "")
+	assert [found[0] for found in find_label_files([str(tmp_path)])] == [label, legacy]
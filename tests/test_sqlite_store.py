@@ -0,0 +1,104 @@
+import sqlite3
+
+import pytest
+
+from utils.event_class import Event
+from utils.label_writer import LabelWriter
+from utils.list_management import ListManager
+from utils.sqlite_store import SCHEMA, SqliteStore, match_key
+
+CSV = "frame,team,event,minute,second,x,y,video_ms\n" \
+	"25,home,pass,0,1.0,10,20,1000\n" \
+	"50,,out,0,2.0,,,2000\n"
+
+@pytest.fixture
+def label_path(tmp_path):
+
+	path = str(tmp_path / "match.csv")
+	with open(path, 'w') as file:
+		file.write(CSV)
+	return path
+
+@pytest.fixture
+def store(tmp_path):
+
+	store = SqliteStore(str(tmp_path / "labels.sqlite3"))
+	yield store
+	store.close()
+
+def stored_manager(store, path):
+
+	manager = ListManager()
+	manager.store = store
+	manager.create_list_from_csv(path)
+	return manager
+
+def test_delete_event_without_coordinates(store, label_path):
+
+	manager = stored_manager(store, label_path)
+	event = manager.events[1]
+	assert (event.team, event.x_coord, event.y_coord) == ("", -1, -1)
+	manager.delete_event(event.event_id)
+	manager.save_file(label_path, 1)
+
+	assert [event.event for event in stored_manager(store, label_path).event_list] == ["pass"]
+
+def old_database(path, label_path):
+	# Database of the first version: no file state, missing values as NULL
+	connection = sqlite3.connect(path)
+	connection.executescript(SCHEMA)
+	with connection:
+		connection.executemany(
+			"INSERT INTO events (match, frame, team, event, minute, second, x, y, video_ms) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+			[(match_key(label_path), 25, "home", "pass", 0, 1.0, 10, 20, 1000), (match_key(label_path), 50, None, "out", 0, 2.0, None, None, 2000)]
+		)
+		connection.execute("INSERT INTO matches (match) VALUES (?)", (match_key(label_path),))
+	connection.close()
+
+def test_older_databases_are_migrated(tmp_path, label_path):
+
+	path = str(tmp_path / "old.sqlite3")
+	old_database(path, label_path)
+	store = SqliteStore(path)
+	# Stored before file states were kept: the database stays current until the file changes
+	assert store.has_match(label_path)
+	manager = stored_manager(store, label_path)
+	manager.delete_event(manager.events[1].event_id)
+	manager.save_file(label_path, 1)
+	assert len(stored_manager(store, label_path).events) == 1
+	with open(label_path, 'a') as file:
+		file.write("75,away,shot,0,3.0,30,40,3000\n")
+	assert not store.has_match(label_path)
+	store.close()
+
+def test_changed_label_file_is_imported_again(store, label_path):
+
+	stored_manager(store, label_path)
+	with open(label_path, 'a') as file:
+		file.write("75,away,shot,0,3.0,30,40,3000\n")
+	assert not store.has_match(label_path)
+	assert len(stored_manager(store, label_path).events) == 3
+
+def test_exported_label_file_is_not_imported_again(store, label_path):
+
+	manager = stored_manager(store, label_path)
+	manager.delete_event(manager.events[0].event_id)
+	manager.compact_file(label_path, 1)
+	assert store.has_match(label_path)
+	assert [event.event for event in stored_manager(store, label_path).event_list] == ["out"]
+
+def test_compaction_through_writer_keeps_database_edits(store, label_path):
+
+	manager = stored_manager(store, label_path)
+	# Long delay: the edits are still queued when the compaction is submitted
+	manager.writer = LabelWriter(delay=60.0)
+	manager.add_event(Event(75, "away", "shot", 0, 3.0, 30, 40, 3000))
+	manager.save_file(label_path, 1)
+	manager.add_event(Event(100, "home", "cross", 0, 4.0, 50, 60, 4000))
+	# Pending edit handed to the database by the compaction itself
+	manager.compact_file(label_path, 1)
+	manager.writer.close()
+
+	assert store.summary(label_path) == (4, 4000)
+	assert store.has_match(label_path)
+	assert [event.event for event in stored_manager(store, label_path).event_list] == ["cross", "shot", "out", "pass"]
@@ -0,0 +1,141 @@
+import os
+from utils.event_table import COLUMNS, REQUIRED_COLUMNS, EventTable
+from utils.lazy_import import lazy_import
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+pa = lazy_import("pyarrow")
+pq = lazy_import("pyarrow.parquet")
+
+# Typed columnar label files for downstream tools, written and read with pyarrow (optional dependency).
+# .parquet: compressed, for storage and exchange
+# .arrow (Arrow IPC file, also .feather/.ipc): uncompressed, read through a memory map without copying
+# Both hold the csv columns sorted by video_ms, team and event as dictionary (categorical) columns.
+
+ARROW_EXTENSIONS = (".arrow", ".feather", ".ipc")
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+
+INTEGER_COLUMNS = ["frame", "minute", "x", "y", "video_ms"]
+# Missing coordinates are written as -1, like Event and SqliteStore hold them
+COORDINATE_COLUMNS = ["x", "y"]
+CATEGORY_COLUMNS = ["team", "event"]
+
+def is_columnar(path):
+
+	return path.lower().endswith(ARROW_EXTENSIONS + PARQUET_EXTENSIONS)
+
+def _require_pyarrow():
+
+	try:
+		pa.__version__
+	except ImportError as error:
+		raise ImportError("Parquet and Arrow files need pyarrow: pip install pyarrow") from error
+
+def schema():
+
+	category = pa.dictionary(pa.int32(), pa.string())
+	return pa.schema([
+		("frame", pa.int64()),
+		("team", category),
+		("event", category),
+		("minute", pa.int64()),
+		("second", pa.float64()),
+		("x", pa.int64()),
+		("y", pa.int64()),
+		("video_ms", pa.int64()),
+	])
+
+def dataframe_to_arrow(df):
+
+	_require_pyarrow()
+	df = df.sort_values(by=["video_ms"], kind="stable")
+	target = schema()
+	arrays = list()
+	for field in target:
+		column = df[field.name]
+		if field.name in CATEGORY_COLUMNS:
+			if not isinstance(column.dtype, pd.CategoricalDtype):
+				column = column.astype(str).astype("category")
+			array = pa.array(column)
+		elif field.name in COORDINATE_COLUMNS:
+			array = pa.array(column.astype(np.float64).fillna(-1).to_numpy(dtype=np.int64))
+		elif field.name in INTEGER_COLUMNS:
+			array = pa.array(column.to_numpy(dtype=np.int64))
+		else:
+			array = pa.array(column.to_numpy(dtype=np.float64))
+		arrays.append(array.cast(field.type))
+	return pa.Table.from_arrays(arrays, schema=target)
+
+def write_columnar(path, df):
+	# Written next to the target and renamed over it, like the label csv
+	table = dataframe_to_arrow(df)
+	temp_path = path + ".tmp"
+	if path.lower().endswith(PARQUET_EXTENSIONS):
+		pq.write_table(table, temp_path)
+	elif path.lower().endswith(ARROW_EXTENSIONS):
+		# One record batch and no compression, so readers can map the columns directly
+		with pa.OSFile(temp_path, 'wb') as sink:
+			with pa.ipc.new_file(sink, table.schema) as writer:
+				writer.write_table(table, max_chunksize=max(1, len(table)))
+	else:
+		raise ValueError(f"Unknown columnar format: {path}")
+	os.replace(temp_path, path)
+
+def read_arrow(path, memory_map=True):
+	# pyarrow Table of a columnar label file; with memory_map, the columns of an .arrow file stay
+	# in the memory map, which keeps the file open (Windows then refuses to replace it)
+	_require_pyarrow()
+	if path.lower().endswith(PARQUET_EXTENSIONS):
+		return pq.read_table(path, memory_map=memory_map)
+	if path.lower().endswith(ARROW_EXTENSIONS):
+		if memory_map:
+			return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+		with pa.OSFile(path, 'rb') as source:
+			return pa.ipc.open_file(source).read_all()
+	raise ValueError(f"Unknown columnar format: {path}")
+
+def read_dataframe(path):
+	# pandas DataFrame with categorical team and event columns
+	return read_arrow(path).to_pandas()
+
+def _numpy(column):
+	# Without a copy for a single chunk without nulls, as written by write_columnar
+	if column.num_chunks == 1 and column.null_count == 0:
+		return column.chunk(0).to_numpy(zero_copy_only=False)
+	return column.to_numpy()
+
+def _categories(column):
+	# (codes, names) of a dictionary column, -1 for nulls like pandas categoricals
+	if not pa.types.is_dictionary(column.type):
+		column = column.dictionary_encode()
+	chunk = column.combine_chunks() if column.num_chunks != 1 else column.chunk(0)
+	codes = chunk.indices
+	if codes.null_count:
+		codes = codes.fill_null(-1)
+	return codes.to_numpy(zero_copy_only=False), chunk.dictionary.to_pylist()
+
+def read_columnar(path, memory_map=True):
+	# EventTable of a columnar label file, see read_arrow for memory_map
+	table = read_arrow(path, memory_map)
+	missing = [column for column in COLUMNS if column not in table.column_names]
+	if missing:
+		raise KeyError(f"Missing columns in {path}: {', '.join(missing)}")
+	empty = [column for column in REQUIRED_COLUMNS if table.column(column).null_count]
+	if empty:
+		raise ValueError(f"{path}: empty {', '.join(empty)} values")
+	if any(table.column(name).num_chunks > 1 for name in CATEGORY_COLUMNS):
+		# Chunks written by other tools may each have their own dictionary
+		table = table.unify_dictionaries()
+	team_codes, teams = _categories(table.column("team"))
+	event_codes, event_names = _categories(table.column("event"))
+	return EventTable(
+		_numpy(table.column("frame")).astype(np.int64, copy=False),
+		team_codes,
+		teams,
+		event_codes,
+		event_names,
+		_numpy(table.column("minute")),
+		_numpy(table.column("second")),
+		_numpy(table.column("x")),
+		_numpy(table.column("y")),
+		_numpy(table.column("video_ms")).astype(np.int64, copy=False),
+	)
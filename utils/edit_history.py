@@ -0,0 +1,44 @@
+from collections import deque
+
+class EditHistory:
+# Undo/redo stacks of the edits made through the ListManager.
+# A command is (op, removed, added) with the Event objects the edit took out of the list
+# and put into it (None for a plain add or delete); undoing it swaps them back.
+# The same Event objects are re-inserted, so later commands still find them by event_id.
+# Both stacks are bounded, the oldest commands are dropped past `limit`.
+
+	def __init__(self, limit=10000):
+
+		self.undo_stack = deque(maxlen=limit)
+		self.redo_stack = deque(maxlen=limit)
+
+	def record(self, op, removed, added):
+
+		self.undo_stack.append((op, removed, added))
+		# A new edit forks the history
+		self.redo_stack.clear()
+
+	def clear(self):
+
+		self.undo_stack.clear()
+		self.redo_stack.clear()
+
+	def can_undo(self):
+
+		return len(self.undo_stack) > 0
+
+	def can_redo(self):
+
+		return len(self.redo_stack) > 0
+
+	def pop_undo(self):
+
+		command = self.undo_stack.pop()
+		self.redo_stack.append(command)
+		return command
+
+	def pop_redo(self):
+
+		command = self.redo_stack.pop()
+		self.undo_stack.append(command)
+		return command
@@ -1,20 +1,41 @@
+import math
+import sys
 
+def _coordinate(value):
+	# Missing coordinates are stored as -1, like an unset click
+	if type(value) is int:
+		return value
+	value = float(value)
+	return -1 if math.isnan(value) else int(value)
 
 class Event:
-# Event(tmp_team, tmp_label, tmp_period, tmp_minute, tmp_second, tmp_x_coord, tmp_y_coord))
+# Event(tmp_frame, tmp_team, tmp_label, tmp_minute, tmp_second, tmp_x_coord, tmp_y_coord, tmp_position)
+# Fields are typed and fixed by __slots__; team and event names are interned so
+# events share one string per class. Events are not modified after creation,
+# an edit replaces the event, so the display text is formatted once and cached.
+	__slots__ = ("frame", "team", "event", "minute", "second", "x_coord", "y_coord", "position", "event_id", "_text")
+
 	def __init__(self, frame, team, event, minute, second, x_coord, y_coord, position):
-		self.team = team
-		self.event = event
-		self.minute = str(minute)
-		self.second = str(second)
-		self.x_coord = x_coord
-		self.y_coord = y_coord
-		self.position = position
-		self.time = str(self.minute).zfill(2) + ":" + str(self.second.split(".")[0]).zfill(2) + "." + str(self.second.split(".")[1]).zfill(2)
-		self.frame = str(frame)
+		self.team = sys.intern(str(team))
+		self.event = sys.intern(str(event))
+		self.minute = int(minute)
+		self.second = float(second)
+		self.x_coord = _coordinate(x_coord)
+		self.y_coord = _coordinate(y_coord)
+		self.position = int(position)
+		self.frame = int(frame)
+		# Assigned by the EventIndex when the event is added to a list
+		self.event_id = None
+		self._text = None
+
+	@property
+	def time(self):
+		return f"{self.minute:02d}:{self.second:06.3f}"
 
 	def to_text(self):
-		return str(self.frame) + " || " + str(self.event) + " - " + str(self.team)  + " - " + str(self.x_coord) + " - " + str(self.y_coord) 
+		if self._text is None:
+			self._text = f"{self.frame} || {self.event} - {self.team} - {self.x_coord} - {self.y_coord}"
+		return self._text
 
 	def __lt__(self, other):
 		return self.position < other.position
@@ -23,4 +44,4 @@ def ms_to_time(position):
 	minutes = int(position//1000)//60
 	seconds = (position//1000)%60
 	ms = position%1000
-	return str(minutes).zfill(2), f"{str(seconds).zfill(2)}.{str(ms).zfill(2)}"
\ No newline at end of file
+	return str(minutes).zfill(2), f"{str(seconds).zfill(2)}.{str(ms).zfill(3)}"
@@ -0,0 +1,149 @@
+from utils.event_index import ID_MASK, make_key
+import bisect
+from utils.lazy_import import lazy_import
+np = lazy_import("numpy")
+
+class EventFilter:
+# Criteria of the list filter bar, None means no constraint
+
+	def __init__(self, event=None, team=None, start_ms=None, end_ms=None, start_frame=None, end_frame=None):
+
+		self.event = event
+		self.team = team
+		self.start_ms = start_ms
+		self.end_ms = end_ms
+		self.start_frame = start_frame
+		self.end_frame = end_frame
+
+	def is_empty(self):
+
+		return all(value is None for value in (self.event, self.team, self.start_ms, self.end_ms, self.start_frame, self.end_frame))
+
+	def matches(self, event):
+
+		if self.event is not None and event.event != self.event:
+			return False
+		if self.team is not None and event.team != self.team:
+			return False
+		if self.start_ms is not None and event.position < self.start_ms:
+			return False
+		if self.end_ms is not None and event.position > self.end_ms:
+			return False
+		if self.start_frame is not None and event.frame < self.start_frame:
+			return False
+		if self.end_frame is not None and event.frame > self.end_frame:
+			return False
+		return True
+
+class FilterIndex:
+# Inverted index over an EventIndex: for every event class, team and (event class, team) pair,
+# the sorted keys of its events. Time ranges are bisects into these lists.
+# Built on first use, then kept up to date by add() and remove().
+
+	def __init__(self, events):
+
+		self.events = events
+		self.postings = None
+
+	def reset(self):
+
+		self.postings = None
+
+	def build(self):
+
+		keys = np.array(self.events.keys, dtype=np.int64)
+		event_names, teams = self.names_of(keys & ID_MASK)
+		event_values, event_codes = np.unique(event_names.astype(str), return_inverse=True)
+		team_values, team_codes = np.unique(teams.astype(str), return_inverse=True)
+		event_values = event_values.tolist()
+		team_values = team_values.tolist()
+		self.postings = dict()
+		groupings = (
+			(event_codes, lambda code: (event_values[code], None)),
+			(team_codes, lambda code: (None, team_values[code])),
+			(event_codes * len(team_values) + team_codes, lambda code: (event_values[code // len(team_values)], team_values[code % len(team_values)])),
+		)
+		for codes, combo in groupings:
+			# A stable sort by code keeps every group in key order
+			order = np.argsort(codes, kind='stable')
+			sorted_codes = codes[order]
+			for group in np.split(order, np.flatnonzero(np.diff(sorted_codes)) + 1):
+				if len(group):
+					self.postings[combo(int(codes[group[0]]))] = keys[group].tolist()
+
+	def names_of(self, ids):
+		# Event class and team of each id, from the table codes where possible
+		event_names = np.empty(len(ids), dtype=object)
+		teams = np.empty(len(ids), dtype=object)
+		table = self.events.table
+		table_length = len(table) if table is not None else 0
+		in_table = ids < table_length
+		if table_length:
+			rows = ids[in_table]
+			# Code -1 (missing value) picks the trailing "", like EventTable.event
+			event_names[in_table] = np.array(table.event_names + [""], dtype=object)[table.event_codes[rows]]
+			teams[in_table] = np.array(table.teams + [""], dtype=object)[table.team_codes[rows]]
+		for position in np.flatnonzero(~in_table).tolist():
+			event = self.events.get(int(ids[position]))
+			event_names[position] = event.event
+			teams[position] = event.team
+		return event_names, teams
+
+	def combos(self, event):
+
+		return ((event.event, None), (None, event.team), (event.event, event.team))
+
+	def add(self, event):
+
+		if self.postings is None:
+			return
+		key = make_key(event.position, event.event_id)
+		for combo in self.combos(event):
+			bisect.insort(self.postings.setdefault(combo, list()), key)
+
+	def remove(self, event):
+
+		if self.postings is None:
+			return
+		key = make_key(event.position, event.event_id)
+		for combo in self.combos(event):
+			keys = self.postings.get(combo)
+			if keys is None:
+				continue
+			index = bisect.bisect_left(keys, key)
+			if index < len(keys) and keys[index] == key:
+				del keys[index]
+
+	def keys_for(self, event_name=None, team=None):
+		# Sorted keys of the events matching the class and team, do not modify
+		if event_name is None and team is None:
+			return self.events.keys
+		if self.postings is None:
+			self.build()
+		return self.postings.get((event_name, team), list())
+
+	def frame_bound(self, keys, start, end, frame, right=False):
+		# Binary search on frame within keys[start:end]; frames grow with video_ms,
+		# as they are derived from it when annotating
+		while start < end:
+			middle = (start + end) // 2
+			middle_frame = self.events.frame_of(keys[middle] & ID_MASK)
+			if middle_frame < frame or (right and middle_frame == frame):
+				start = middle + 1
+			else:
+				end = middle
+		return start
+
+	def lookup(self, event_filter):
+		# Keys (time ascending) of the events matching the filter
+		keys = self.keys_for(event_filter.event, event_filter.team)
+		start, end = 0, len(keys)
+		if event_filter.start_ms is not None:
+			start = bisect.bisect_left(keys, make_key(event_filter.start_ms, 0))
+		if event_filter.end_ms is not None:
+			end = bisect.bisect_right(keys, make_key(event_filter.end_ms, ID_MASK))
+		if event_filter.start_frame is not None:
+			start = self.frame_bound(keys, start, end, event_filter.start_frame)
+		if event_filter.end_frame is not None:
+			end = self.frame_bound(keys, start, end, event_filter.end_frame, right=True)
+		return keys[start:max(start, end)]
@@ -0,0 +1,114 @@
+import bisect
+from utils.lazy_import import lazy_import
+np = lazy_import("numpy")
+
+# Sort keys pack (video_ms, event_id) into one int so the index is a flat list of ints
+ID_BITS = 32
+ID_MASK = (1 << ID_BITS) - 1
+
+def make_key(position, event_id):
+	return (int(position) << ID_BITS) | event_id
+
+class EventIndex:
+# Events kept sorted by (video_ms, event_id) so edits are a bisect instead of a full sort.
+# Every event gets an event_id that stays valid until it is removed.
+# Rows loaded from an EventTable use their row number as event_id and are only
+# turned into Event objects when accessed.
+
+	def __init__(self):
+
+		self.keys = list()
+		self.by_id = dict()
+		self.table = None
+		self.next_id = 0
+
+	def __len__(self):
+
+		return len(self.keys)
+
+	def __iter__(self):
+
+		for key in self.keys:
+			yield self.get(key & ID_MASK)
+
+	def __getitem__(self, index):
+
+		return self.get(self.keys[index] & ID_MASK)
+
+	def __contains__(self, event_id):
+
+		if event_id not in self.by_id and (self.table is None or not 0 <= event_id < len(self.table)):
+			return False
+		key = make_key(self.position_of(event_id), event_id)
+		index = bisect.bisect_left(self.keys, key)
+		return index < len(self.keys) and self.keys[index] == key
+
+	def clear(self):
+
+		self.keys.clear()
+		self.by_id.clear()
+		self.table = None
+		self.next_id = 0
+
+	def load_table(self, table):
+
+		self.clear()
+		self.table = table
+		order = np.argsort(table.video_ms, kind='stable')
+		keys = (table.video_ms[order].astype(np.int64) << ID_BITS) | order.astype(np.int64)
+		self.keys = keys.tolist()
+		self.next_id = len(table)
+
+	def get(self, event_id):
+
+		event = self.by_id.get(event_id)
+		if event is None:
+			event = self.table.event(event_id)
+			event.event_id = event_id
+			self.by_id[event_id] = event
+		return event
+
+	def position_of(self, event_id):
+
+		event = self.by_id.get(event_id)
+		if event is None:
+			return int(self.table.video_ms[event_id])
+		return event.position
+
+	def frame_of(self, event_id):
+
+		event = self.by_id.get(event_id)
+		if event is None:
+			return int(self.table.frame[event_id])
+		return event.frame
+
+	def index_of(self, event_id):
+
+		return bisect.bisect_left(self.keys, make_key(self.position_of(event_id), event_id))
+
+	def insert_index(self, event, event_id=None):
+		# Where insert() will place the event, it gets next_id as its event_id by default
+		return bisect.bisect_right(self.keys, make_key(event.position, self.next_id if event_id is None else event_id))
+
+	def insert(self, event, event_id=None):
+		# A removed event can be put back under its former event_id, e.g. on undo
+		if event_id is None:
+			event_id = self.next_id
+			self.next_id += 1
+		event.event_id = event_id
+		bisect.insort(self.keys, make_key(event.position, event.event_id))
+		self.by_id[event.event_id] = event
+		return event.event_id
+
+	def remove(self, event_id):
+
+		event = self.get(event_id)
+		del self.keys[self.index_of(event_id)]
+		del self.by_id[event_id]
+		return event
+
+	def between(self, start_ms, end_ms):
+		# Events with start_ms <= video_ms <= end_ms, in time order
+		start = bisect.bisect_left(self.keys, make_key(start_ms, 0))
+		end = bisect.bisect_right(self.keys, make_key(end_ms, ID_MASK))
+		return [self.get(key & ID_MASK) for key in self.keys[start:end]]
@@ -0,0 +1,126 @@
+from utils.event_class import Event
+from utils.event_index import ID_MASK
+import os
+from utils.lazy_import import lazy_import
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+COLUMNS = ['frame', 'team', 'event', 'minute', 'second', 'x', 'y', 'video_ms']
+# Columns an event cannot do without; empty team, event, x and y cells are read as "" and -1
+REQUIRED_COLUMNS = ['frame', 'minute', 'second', 'video_ms']
+
+def _scalar(value):
+	# Plain Python value for a NumPy array element
+	return value.item() if hasattr(value, "item") else value
+
+class EventTable:
+# Columnar content of a label csv.
+# frame, video_ms, x and y are NumPy arrays, team and event are categorical codes.
+
+	def __init__(self, frame, team_codes, teams, event_codes, event_names, minute, second, x, y, video_ms):
+
+		self.frame = frame
+		self.team_codes = team_codes
+		self.teams = teams
+		self.event_codes = event_codes
+		self.event_names = event_names
+		self.minute = minute
+		self.second = second
+		self.x = x
+		self.y = y
+		self.video_ms = video_ms
+
+	def __len__(self):
+
+		return len(self.video_ms)
+
+	def event(self, row):
+
+		team_code = self.team_codes[row]
+		event_code = self.event_codes[row]
+		return Event(
+			_scalar(self.frame[row]),
+			self.teams[team_code] if team_code >= 0 else "",
+			self.event_names[event_code] if event_code >= 0 else "",
+			_scalar(self.minute[row]),
+			_scalar(self.second[row]),
+			_scalar(self.x[row]),
+			_scalar(self.y[row]),
+			_scalar(self.video_ms[row]),
+		)
+
+def read_event_table(path):
+
+	data = pd.read_csv(path, dtype={"team": "category", "event": "category"})
+	# Label files created by older versions used x_coord/y_coord headers
+	data = data.rename(columns={"x_coord": "x", "y_coord": "y"})
+	check_required(data, path)
+	return dataframe_to_table(data)
+
+def check_required(data, path):
+	# Empty required cells would become INT64_MIN frames and times, fail on them instead
+	for column in REQUIRED_COLUMNS:
+		rows = np.flatnonzero(data[column].isna().to_numpy())
+		if len(rows):
+			# Line numbers of the csv, after the header
+			lines = ", ".join(str(row + 2) for row in rows[:5].tolist()) + (", ..." if len(rows) > 5 else "")
+			raise ValueError(f"{path}: empty {column} on line {lines}")
+
+def dataframe_to_table(data):
+
+	team = data["team"].astype("category")
+	event = data["event"].astype("category")
+	return EventTable(
+		data["frame"].to_numpy(dtype=np.int64),
+		team.cat.codes.to_numpy(),
+		team.cat.categories.astype(str).tolist(),
+		event.cat.codes.to_numpy(),
+		event.cat.categories.astype(str).tolist(),
+		data["minute"].to_numpy(),
+		data["second"].to_numpy(),
+		data["x"].to_numpy(),
+		data["y"].to_numpy(),
+		data["video_ms"].to_numpy(dtype=np.int64),
+	)
+
+def index_to_dataframe(index):
+	# Rows still backed by the table are copied column-wise,
+	# only events added since loading go through Python objects
+	ids = np.array(index.keys, dtype=np.int64) & ID_MASK
+	table = index.table
+	table_length = len(table) if table is not None else 0
+	rows = ids[ids < table_length]
+	parts = list()
+	if len(rows):
+		parts.append(pd.DataFrame({
+			"frame": table.frame[rows],
+			"team": pd.Categorical.from_codes(table.team_codes[rows], table.teams),
+			"event": pd.Categorical.from_codes(table.event_codes[rows], table.event_names),
+			"minute": table.minute[rows],
+			"second": table.second[rows],
+			"x": table.x[rows],
+			"y": table.y[rows],
+			"video_ms": table.video_ms[rows],
+		}))
+	added = [index.by_id[event_id] for event_id in ids[ids >= table_length].tolist()]
+	if added:
+		parts.append(pd.DataFrame(
+			[[event.frame, event.team, event.event, event.minute, event.second, event.x_coord, event.y_coord, event.position] for event in added],
+			columns=COLUMNS
+		))
+	if not parts:
+		return pd.DataFrame(columns=COLUMNS)
+	return pd.concat(parts, ignore_index=True)
+
+def write_label_csv(path, df):
+	df['frame'] = df['frame'].astype(int)
+	df = df.sort_values(by=['frame'], kind='stable')
+	df['frame'] = df['frame'].astype(str)
+	# Write a temporary file next to the label file and rename it over the original,
+	# so a crash mid-write never leaves a truncated label file
+	temp_path = path + ".tmp"
+	with open(temp_path, 'w', newline='') as file:
+		df.to_csv(file, index=False)
+		file.flush()
+		os.fsync(file.fileno())
+	os.replace(temp_path, path)
@@ -0,0 +1,176 @@
+from collections import deque
+import os
+from utils.lazy_import import lazy_import
+from utils.tracing import traced
+cv2 = lazy_import("cv2")
+
+# Memory for the frames kept by frame stepping, STE_STEP_BUFFER_MB overrides the default
+DEFAULT_STEP_BUFFER_MB = 512
+
+def step_buffer_bytes(environ=os.environ):
+
+	try:
+		megabytes = float(environ.get("STE_STEP_BUFFER_MB", DEFAULT_STEP_BUFFER_MB))
+	except ValueError:
+		megabytes = DEFAULT_STEP_BUFFER_MB
+	return max(1, int(megabytes * 1024 * 1024))
+
+class FrameRing:
+# Consecutive decoded frames first .. first + len - 1, bounded by max_bytes.
+# Appending past the capacity drops the oldest frame, prepending drops the newest.
+
+	def __init__(self, max_bytes):
+
+		self.max_bytes = max_bytes
+		self.frames = deque()
+		self.first = 0
+		self.frame_bytes = None
+
+	def __len__(self):
+
+		return len(self.frames)
+
+	def __contains__(self, index):
+
+		return self.first <= index < self.end
+
+	@property
+	def end(self):
+		# Index after the last frame
+		return self.first + len(self.frames)
+
+	def capacity(self):
+
+		if not self.frame_bytes:
+			return 1
+		return max(1, self.max_bytes // self.frame_bytes)
+
+	def get(self, index):
+
+		if index not in self:
+			return None
+		return self.frames[index - self.first]
+
+	def clear(self):
+
+		self.frames.clear()
+		self.first = 0
+
+	def append(self, index, frame):
+
+		self.frame_bytes = frame.nbytes
+		if not self.frames or index != self.end:
+			self.frames.clear()
+			self.first = index
+		self.frames.append(frame)
+		while len(self.frames) > self.capacity():
+			self.frames.popleft()
+			self.first += 1
+
+	def prepend(self, first, frames):
+		# frames: consecutive frames starting at first, ending right before the ring's first frame
+		if not frames:
+			return
+		self.frame_bytes = frames[0].nbytes
+		if not self.frames or first + len(frames) != self.first:
+			self.frames.clear()
+		self.frames.extendleft(reversed(frames))
+		self.first = first
+		while len(self.frames) > self.capacity():
+			self.frames.pop()
+
+class FrameStepper:
+# Frame-by-frame access to a video through its own OpenCV capture, the recent frames kept in a FrameRing.
+# Stepping forward reads the next frame; stepping backward is served from the ring, and only when
+# the target has left it the capture seeks back and decodes back_fill frames up to the target at once,
+# so the following back-steps are in memory again. Not thread safe, used from the GUI thread.
+
+	def __init__(self, path, buffer_bytes=None, back_fill=30, max_skip=15):
+
+		self.path = path
+		self.ring = FrameRing(step_buffer_bytes() if buffer_bytes is None else buffer_bytes)
+		self.back_fill = back_fill
+		# Forward gaps up to this many frames are decoded instead of seeking
+		self.max_skip = max_skip
+		self.capture = None
+		# Index of the frame the next read() returns, None when unknown
+		self.next_index = None
+
+	def open(self):
+
+		if self.capture is None:
+			self.capture = cv2.VideoCapture(self.path)
+			self.next_index = 0
+		return self.capture.isOpened()
+
+	def release(self):
+
+		if self.capture is not None:
+			self.capture.release()
+			self.capture = None
+		self.next_index = None
+		self.ring.clear()
+
+	def frame_at(self, index):
+		# Frame index of the video, None when it cannot be decoded
+		if index < 0:
+			return None
+		frame = self.ring.get(index)
+		if frame is not None:
+			return frame
+		if len(self.ring) and self.ring.first - self.back_fill <= index < self.ring.first:
+			return self.fill_back(index)
+		return self.decode_forward(index)
+
+	@traced
+	def decode_forward(self, index):
+
+		if not self.open():
+			return None
+		if self.next_index is None or not 0 <= index - self.next_index <= self.max_skip:
+			self.capture.set(cv2.CAP_PROP_POS_FRAMES, index)
+			self.next_index = index
+		# Frames skipped over are kept too, they are the next back-steps
+		frame = None
+		while self.next_index <= index:
+			if self.next_index in self.ring:
+				# Kept already (the capture is behind the ring after fill_back), only move past it
+				ok = self.capture.grab()
+				frame = self.ring.get(self.next_index)
+			else:
+				ok, frame = self.capture.read()
+				if ok and frame is not None:
+					self.ring.append(self.next_index, frame)
+			if not ok or frame is None:
+				self.next_index = None
+				return None
+			self.next_index += 1
+		return frame
+
+	@traced
+	def fill_back(self, index):
+		# Decodes the frames before the ring, up to and including index.
+		# The capture is left after the last frame decoded, the ring's former first frame.
+		if not self.open():
+			return None
+		end = self.ring.first
+		count = min(self.back_fill, max(1, self.ring.capacity() - 1))
+		first = max(0, min(index, end - count))
+		self.capture.set(cv2.CAP_PROP_POS_FRAMES, first)
+		self.next_index = first
+		frames = []
+		while self.next_index < end:
+			ok, frame = self.capture.read()
+			if not ok or frame is None:
+				self.next_index = None
+				break
+			frames.append(frame)
+			self.next_index += 1
+		if self.next_index != end:
+			# Could not decode up to the ring, keep what was read as a new ring
+			self.ring.clear()
+			for offset, frame in enumerate(frames):
+				self.ring.append(first + offset, frame)
+		else:
+			self.ring.prepend(first, frames)
+		return self.ring.get(index)
@@ -0,0 +1,142 @@
+import math
+import os
+import sys
+import threading
+import time
+from utils.lazy_import import lazy_import
+np = lazy_import("numpy")
+cv2 = lazy_import("cv2")
+
+# Per-frame presentation timestamps of a video, cached in a sidecar next to it.
+# All ms <-> frame conversions go through FrameTimestamps so every call site rounds the same way:
+# the frame shown at a position is the last frame whose timestamp is <= position,
+# and seeking to a frame uses its timestamp rounded up to the next whole ms.
+
+def sidecar_path(path):
+	return path + ".pts.npz"
+
+class FrameTimestamps:
+
+	def __init__(self, fps, pts=None):
+
+		self.fps = fps if fps and fps > 1.0 else 30.0
+		# Frame timestamps in ms, None until the video has been scanned
+		self.pts = pts
+
+	def __len__(self):
+
+		return 0 if self.pts is None else len(self.pts)
+
+	def is_exact(self):
+
+		return self.pts is not None
+
+	def frame_at(self, position_ms):
+
+		if self.pts is None:
+			# Small epsilon so that exact frame boundaries do not floor to the previous frame
+			return max(0, int(position_ms * self.fps / 1000.0 + 1e-6))
+		index = int(np.searchsorted(self.pts, position_ms, side='right')) - 1
+		return max(0, index)
+
+	def frames_at(self, positions_ms):
+		# frame_at for an array of positions
+		positions_ms = np.asarray(positions_ms, dtype=np.float64)
+		if self.pts is None:
+			return np.maximum(0, (positions_ms * self.fps / 1000.0 + 1e-6).astype(np.int64))
+		return np.maximum(0, np.searchsorted(self.pts, positions_ms, side='right') - 1)
+
+	def position_of(self, frame):
+
+		if self.pts is None:
+			return max(0, math.ceil(frame * 1000.0 / self.fps - 1e-6))
+		frame = min(max(0, frame), len(self.pts) - 1)
+		return math.ceil(self.pts[frame])
+
+# When the GUI scans a video without a sidecar, STE_PTS_SCAN overrides the default:
+# auto: when the first frames are not 1000/fps ms apart, otherwise the frame rate is exact
+# open: every video, when it is opened
+# step: with the first frame step of the video
+# off: never, conversions use the frame rate
+SCAN_MODES = ("auto", "open", "step", "off")
+
+def timestamp_scan_mode(environ=os.environ):
+
+	mode = environ.get("STE_PTS_SCAN", "auto").strip().lower()
+	return mode if mode in SCAN_MODES else "auto"
+
+def has_constant_frame_rate(path, fps, frames=120):
+	# Whether the first frames start at 0 and are 1000/fps ms apart, so the frame rate converts exactly.
+	# None when the video cannot be read.
+	capture = cv2.VideoCapture(path)
+	if not capture.isOpened():
+		capture.release()
+		return None
+	pts = list()
+	while len(pts) < frames and capture.grab():
+		pts.append(capture.get(cv2.CAP_PROP_POS_MSEC))
+	capture.release()
+	if not pts or not fps:
+		return None
+	expected = np.arange(len(pts)) * 1000.0 / fps
+	return bool(np.all(np.abs(np.asarray(pts, dtype=np.float64) - expected) < 1.0))
+
+def lower_thread_priority(niceness=10):
+	# For the thread scanning in the background, so playback and decoding get the CPU first.
+	# Linux gives each thread its own nice value; elsewhere this does nothing.
+	if not sys.platform.startswith("linux") or not hasattr(os, "setpriority"):
+		return
+	try:
+		os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), niceness)
+	except OSError:
+		pass
+
+def scan_timestamps(path, stop=None, load=1.0, chunk=200):
+	# Reads the timestamp of every frame, returns None on failure or when stopped.
+	# load < 1 throttles the scan: after every chunk of frames it pauses so it is busy that share of the time.
+	capture = cv2.VideoCapture(path)
+	if not capture.isOpened():
+		capture.release()
+		return None
+	pts = list()
+	chunk_start = time.perf_counter()
+	while capture.grab():
+		if stop is not None and stop.is_set():
+			capture.release()
+			return None
+		pts.append(capture.get(cv2.CAP_PROP_POS_MSEC))
+		if load < 1.0 and len(pts) % chunk == 0:
+			pause = (time.perf_counter() - chunk_start) * (1.0 - load) / load
+			if stop is not None:
+				stop.wait(pause)
+			else:
+				time.sleep(pause)
+			chunk_start = time.perf_counter()
+	capture.release()
+	if not pts:
+		return None
+	# Guard against backends reporting non-monotonic values
+	return np.maximum.accumulate(np.asarray(pts, dtype=np.float64))
+
+def load_timestamps(path):
+
+	sidecar = sidecar_path(path)
+	if not os.path.isfile(sidecar):
+		return None
+	try:
+		with np.load(sidecar) as data:
+			stat = os.stat(path)
+			if int(data["size"]) != stat.st_size or int(data["mtime_ns"]) != stat.st_mtime_ns:
+				return None
+			return data["pts"]
+	except (OSError, ValueError, KeyError):
+		return None
+
+def save_timestamps(path, pts):
+
+	stat = os.stat(path)
+	try:
+		with open(sidecar_path(path), 'wb') as file:
+			np.savez(file, pts=pts, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+	except OSError as error:
+		print(f"Could not write frame timestamps next to the video: {error}")
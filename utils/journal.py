@@ -0,0 +1,127 @@
+from utils.event_class import Event
+import hashlib
+import json
+import os
+import time
+
+# Append-only log of annotation edits stored next to the label csv.
+# Each line is one JSON record: {"op": "add" | "delete", <csv columns>}.
+# The csv itself is only rewritten when the journal is compacted.
+# The first record, {"op": "base", ...}, holds the size and a digest of the content of the csv the
+# journal was started on. A compaction replaces the csv before removing the journal, so a journal
+# left over by a crash in between no longer matches the csv and is set aside instead of applying
+# its edits a second time. Copies, backups and touched files keep their content and still match.
+
+def journal_path(path):
+	return path + ".journal"
+
+def label_digest(path):
+	# Digest of the content of the label file, None when it is missing
+	digest = hashlib.blake2b(digest_size=16)
+	try:
+		with open(path, 'rb') as file:
+			for block in iter(lambda: file.read(1 << 20), b""):
+				digest.update(block)
+	except OSError:
+		return None
+	return digest.hexdigest()
+
+def base_record(path):
+
+	size = os.path.getsize(path) if os.path.isfile(path) else None
+	return {"op": "base", "size": size, "digest": label_digest(path)}
+
+def matches_base(base, path):
+	# Whether the label file is still the one the journal was started on; bases without a digest are not checked
+	if "digest" not in base:
+		return True
+	size = os.path.getsize(path) if os.path.isfile(path) else None
+	# The size first, so the file is only read when it may match
+	return base["size"] == size and base["digest"] == label_digest(path)
+
+def event_to_record(op, event):
+	return {
+		"op": op,
+		"frame": event.frame,
+		"team": event.team,
+		"event": event.event,
+		"minute": event.minute,
+		"second": event.second,
+		"x": event.x_coord,
+		"y": event.y_coord,
+		"video_ms": event.position,
+	}
+
+def record_to_event(record):
+	return Event(record["frame"], record["team"], record["event"], record["minute"], record["second"], record["x"], record["y"], record["video_ms"])
+
+def event_key(event):
+	# Fields that survive a csv round trip unchanged, used to match deletes on replay
+	return (int(event.frame), str(event.team), str(event.event), int(event.position), int(event.x_coord), int(event.y_coord))
+
+def _to_builtin(value):
+	# numpy scalars coming from pandas
+	if hasattr(value, "item"):
+		return value.item()
+	raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class AnnotationJournal:
+
+	def __init__(self, path):
+
+		self.path = path
+
+	def append(self, records, label_path=None):
+		# label_path: the label file, its base_record is written first when the journal is started
+		if not records:
+			return
+		lines = [json.dumps(record, default=_to_builtin) + "\n" for record in records]
+		if label_path is not None and self.size() == 0:
+			lines.insert(0, json.dumps(base_record(label_path)) + "\n")
+		elif not self.ends_with_newline():
+			# Start on a fresh line after a torn record
+			lines.insert(0, "\n")
+		with open(self.path, 'a') as file:
+			file.writelines(lines)
+
+	def ends_with_newline(self):
+
+		if self.size() == 0:
+			return True
+		with open(self.path, 'rb') as file:
+			file.seek(-1, os.SEEK_END)
+			return file.read(1) == b"\n"
+
+	def replay(self):
+
+		records = list()
+		if not os.path.isfile(self.path):
+			return records
+		with open(self.path) as file:
+			for line in file:
+				line = line.strip()
+				if not line:
+					continue
+				try:
+					records.append(json.loads(line))
+				except ValueError:
+					# Torn record from a crash while appending
+					print(f"Ignoring truncated journal record in {self.path}")
+		return records
+
+	def size(self):
+
+		if not os.path.isfile(self.path):
+			return 0
+		return os.path.getsize(self.path)
+
+	def clear(self):
+
+		if os.path.isfile(self.path):
+			os.remove(self.path)
+
+	def set_aside(self):
+		# Renames the journal out of the way without losing it, returns the new path
+		path = f"{self.path}.{time.strftime('%Y%m%d-%H%M%S')}.stale"
+		os.replace(self.path, path)
+		return path
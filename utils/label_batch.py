@@ -0,0 +1,192 @@
+import csv
+import os
+import time
+from utils.list_management import ListManager
+from utils.event_table import COLUMNS, index_to_dataframe
+from utils.probe_cache import ProbeCache
+from utils.frame_timestamps import FrameTimestamps, load_timestamps
+from utils.columnar import write_columnar
+from utils.media_paths import label_path_for, is_video
+from utils.lazy_import import lazy_import
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# Headless processing of label csv files, one file per call so files can be spread over processes.
+# Labels are loaded with ListManager, so a pending edit journal is applied like in the GUI,
+# and files are written back the way the GUI compacts them (the journal is then dropped).
+
+LEGACY_COLUMNS = {"x_coord": "x", "y_coord": "y"}
+
+CONVERT_FORMATS = {
+	"json": ".json",
+	"jsonl": ".jsonl",
+	"tsv": ".tsv",
+	"parquet": ".parquet",
+	"arrow": ".arrow",
+}
+
+def has_label_columns(path):
+	# Whether the header of a csv has the label columns, other csv files are not label files
+	try:
+		with open(path, newline='') as file:
+			header = next(csv.reader(file), [])
+	except (OSError, UnicodeDecodeError, csv.Error):
+		return False
+	columns = {LEGACY_COLUMNS.get(name.strip(), name.strip()) for name in header}
+	return all(column in columns for column in COLUMNS)
+
+def find_label_files(roots):
+	# [(label path, video path or None, root it was found under)], sorted by label path.
+	# A csv named after a video is its label file, other csv files are included when they have the label columns
+	pairs = dict()
+	for root in roots:
+		if os.path.isfile(root):
+			pairs.setdefault(root, (None, None))
+			continue
+		for directory, _, names in os.walk(root):
+			for name in names:
+				path = os.path.join(directory, name)
+				if is_video(name):
+					label = label_path_for(path)
+					if os.path.isfile(label) and pairs.get(label, (None,))[0] is None:
+						pairs[label] = (path, root)
+				elif name.lower().endswith(".csv") and path not in pairs and has_label_columns(path):
+					pairs[path] = (None, root)
+	return [(label, video, root) for label, (video, root) in sorted(pairs.items())]
+
+def read_classes(path):
+
+	with open(path) as file:
+		return {line.rstrip() for line in file if line.strip()}
+
+def normalized_time(video_ms):
+	# minute and second columns as ms_to_time writes them
+	video_ms = np.asarray(video_ms, dtype=np.int64)
+	return video_ms // 60000, (video_ms % 60000) / 1000.0
+
+def check_columns(path, result):
+	# Header check before parsing, old files may use x_coord/y_coord
+	columns = {LEGACY_COLUMNS.get(name, name) for name in pd.read_csv(path, nrows=0).columns}
+	missing = [column for column in COLUMNS if column not in columns]
+	if missing:
+		result["errors"].append(f"missing columns: {', '.join(missing)}")
+		return False
+	return True
+
+def validate(df, result, classes=None):
+
+	checks = [
+		("negative frame", df["frame"] < 0),
+		("negative video_ms", df["video_ms"] < 0),
+		("second outside [0, 60)", (df["second"] < 0) | (df["second"] >= 60)),
+		("negative minute", df["minute"] < 0),
+		("empty team", df["team"].isna() | (df["team"].astype(str).str.strip() == "")),
+		("empty event", df["event"].isna() | (df["event"].astype(str).str.strip() == "")),
+	]
+	for message, mask in checks:
+		count = int(mask.sum())
+		if count:
+			result["errors"].append(f"{message}: {count} rows")
+
+	minute, second = normalized_time(df["video_ms"])
+	mismatched = int(((df["minute"].to_numpy() != minute) | (np.abs(df["second"].to_numpy() - second) > 0.0005)).sum())
+	if mismatched:
+		result["warnings"].append(f"minute/second differ from video_ms: {mismatched} rows")
+
+	if classes is not None:
+		events, teams = classes
+		unknown_events = sorted(set(df["event"].astype(str)) - events)
+		unknown_teams = sorted(set(df["team"].astype(str)) - teams)
+		if unknown_events:
+			result["warnings"].append(f"events not in the configuration: {', '.join(unknown_events)}")
+		if unknown_teams:
+			result["warnings"].append(f"teams not in the configuration: {', '.join(unknown_teams)}")
+
+def recompute_frames(df, video_path, result, probe_cache_path=None):
+	# frame from video_ms, with the frame timestamps sidecar when the GUI has scanned the video
+	if video_path is None:
+		result["errors"].append("no video found to recompute frames")
+		return False
+	cache = ProbeCache() if probe_cache_path is None else ProbeCache(probe_cache_path)
+	info = cache.probe(video_path)
+	if info is None or info["fps"] is None:
+		result["errors"].append(f"could not read the frame rate of {video_path}")
+		return False
+	timestamps = FrameTimestamps(info["fps"], load_timestamps(video_path))
+	frames = timestamps.frames_at(df["video_ms"].to_numpy())
+	changed = int((df["frame"].to_numpy() != frames).sum())
+	result["changed"]["frame"] = changed
+	df["frame"] = frames
+	return changed > 0
+
+def normalize_time(df, result):
+
+	minute, second = normalized_time(df["video_ms"])
+	changed = int(((df["minute"].to_numpy() != minute) | (np.abs(df["second"].to_numpy() - second) > 0.0005)).sum())
+	result["changed"]["minute_second"] = changed
+	df["minute"] = minute
+	df["second"] = second
+	return changed > 0
+
+def output_path(label_path, extension, output_dir=None, root=None):
+
+	stem = os.path.splitext(label_path)[0]
+	if output_dir is None:
+		return stem + extension
+	relative = os.path.relpath(stem, root) if root else os.path.basename(stem)
+	return os.path.join(output_dir, relative + extension)
+
+def convert(df, path, file_format):
+
+	os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+	if file_format in ("parquet", "arrow"):
+		write_columnar(path, df)
+		return
+	df = df.sort_values(by=["video_ms"], kind="stable")
+	if file_format == "json":
+		df.to_json(path, orient="records", indent=1)
+	elif file_format == "jsonl":
+		df.to_json(path, orient="records", lines=True)
+	elif file_format == "tsv":
+		df.to_csv(path, sep="\t", index=False)
+	else:
+		raise ValueError(f"unknown format {file_format}")
+
+def process_label_file(task):
+	# task: dict with label, video, root and the options of the batch run, returns a result dict.
+	# Never raises, failures are reported in the result.
+	label_path = task["label"]
+	result = {"label": label_path, "video": task.get("video"), "events": 0, "errors": [], "warnings": [], "changed": {}, "outputs": [], "seconds": 0.0}
+	start = time.perf_counter()
+	try:
+		if not check_columns(label_path, result):
+			return finish(result, start)
+		manager = ListManager()
+		manager.create_list_from_csv(label_path)
+		df = index_to_dataframe(manager.events)
+		result["events"] = len(df)
+
+		if task.get("validate"):
+			validate(df, result, task.get("classes"))
+
+		modified = False
+		if task.get("frames"):
+			modified = recompute_frames(df, task.get("video"), result, task.get("probe_cache")) or modified
+		if task.get("normalize"):
+			modified = normalize_time(df, result) or modified
+		if modified and not task.get("dry_run"):
+			manager.write_compaction(label_path, df)
+
+		for file_format in task.get("convert", ()):
+			path = output_path(label_path, CONVERT_FORMATS[file_format], task.get("output_dir"), task.get("root"))
+			if not task.get("dry_run"):
+				convert(df, path, file_format)
+			result["outputs"].append(path)
+	except Exception as error:
+		result["errors"].append(f"{type(error).__name__}: {error}")
+	return finish(result, start)
+
+def finish(result, start):
+
+	result["seconds"] = round(time.perf_counter() - start, 4)
+	return result
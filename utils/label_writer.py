@@ -0,0 +1,119 @@
+import threading
+import time
+
+class LabelWriter:
+# Background thread doing the label file writes for the GUI.
+# Requests arriving less than `delay` seconds apart are written together, appends of edit
+# records for the same file become one write(path, records) call. A compaction
+# supersedes the appends queued before it, since its snapshot already contains them,
+# unless they go somewhere the snapshot is not written to (the label database).
+# The superseded appends are kept with the compaction and written after all if it fails.
+# The write callables run on the writer thread and must only touch the files.
+# on_error(message) is called from the writer thread.
+
+	def __init__(self, on_error=None, delay=0.5):
+
+		self.on_error = on_error
+		self.delay = delay
+		self.jobs = list()
+		self.last_request = 0.0
+		self.running = True
+		self.flushing = False
+		self.busy = False
+		self.condition = threading.Condition()
+		self.thread = threading.Thread(target=self.run, name="label-writer", daemon=True)
+		self.thread.start()
+
+	def append(self, path, records, write):
+
+		if records:
+			self.submit(("append", path, records, write, None))
+
+	def compact(self, path, dataframe, write, supersede=True):
+		# supersede: take the appends queued for path off the queue, the snapshot contains them
+		superseded = list()
+		with self.condition:
+			if supersede:
+				superseded = [job for job in self.jobs if job[0] == "append" and job[1] == path]
+				self.jobs = [job for job in self.jobs if not (job[0] == "append" and job[1] == path)]
+		self.submit(("compact", path, dataframe, write, superseded))
+
+	def submit(self, job):
+
+		with self.condition:
+			self.jobs.append(job)
+			self.last_request = time.monotonic()
+			self.condition.notify_all()
+
+	def flush(self):
+		# Block until everything submitted so far is on disk
+		with self.condition:
+			self.flushing = True
+			self.condition.notify_all()
+			while self.jobs or self.busy:
+				self.condition.wait()
+			self.flushing = False
+
+	def close(self):
+
+		self.flush()
+		with self.condition:
+			self.running = False
+			self.condition.notify_all()
+		self.thread.join()
+
+	def run(self):
+
+		while True:
+			with self.condition:
+				while self.running and not self.jobs:
+					self.condition.wait()
+				if not self.running and not self.jobs:
+					return
+				# Wait for the burst of edits to end
+				while self.running and not self.flushing:
+					remaining = self.last_request + self.delay - time.monotonic()
+					if remaining <= 0:
+						break
+					self.condition.wait(remaining)
+				jobs, self.jobs = self.jobs, list()
+				self.busy = True
+			try:
+				self.write(jobs)
+			finally:
+				with self.condition:
+					self.busy = False
+					self.condition.notify_all()
+
+	def write(self, jobs):
+
+		batch = None
+		for kind, path, payload, write, superseded in jobs:
+			if kind == "append" and batch is not None and (path, write) == batch[:2]:
+				batch[2].extend(payload)
+				continue
+			if batch is not None:
+				self.run_write(*batch)
+				batch = None
+			if kind == "append":
+				batch = (path, write, list(payload))
+			elif not self.run_write(path, write, payload) and superseded:
+				# The snapshot is not on disk, the edits it replaced are written as they were
+				self.write(superseded)
+		if batch is not None:
+			self.run_write(*batch)
+
+	def run_write(self, path, write, payload):
+		# False when the write failed, it is reported
+		try:
+			write(path, payload)
+		except Exception as error:
+			self.report(f"Could not save {path}: {error}")
+			return False
+		return True
+
+	def report(self, message):
+
+		print(message)
+		if self.on_error is not None:
+			self.on_error(message)
@@ -0,0 +1,37 @@
+import importlib
+
+from utils.startup_timing import startup_timer
+
+# Heavy modules (OpenCV, pandas, NumPy) are only imported on first attribute access,
+# so the main window can be shown before they are loaded:
+#     cv2 = lazy_import("cv2")
+
+class LazyModule:
+
+	def __init__(self, name):
+
+		self._name = name
+		self._module = None
+
+	def _load(self):
+
+		if self._module is None:
+			with startup_timer.section(f"import {self._name}"):
+				self._module = importlib.import_module(self._name)
+		return self._module
+
+	def __getattr__(self, attribute):
+		# Only called for attributes not set in __init__
+		return getattr(self._load(), attribute)
+
+	def __repr__(self):
+
+		return f"<lazy module {self._name!r}>"
+
+# One proxy per module name, shared by every importer
+_modules = dict()
+
+def lazy_import(name):
+	if name not in _modules:
+		_modules[name] = LazyModule(name)
+	return _modules[name]
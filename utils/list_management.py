@@ -1,21 +1,73 @@
 from utils.event_class import Event
+from utils.event_index import EventIndex
+from utils.event_filter import FilterIndex
+from utils.edit_history import EditHistory
+from utils.event_table import read_event_table, index_to_dataframe, write_label_csv
+from utils.columnar import is_columnar, read_columnar, write_columnar
+from utils.journal import AnnotationJournal, journal_path, matches_base, event_to_record, record_to_event, event_key
+from utils.tracing import traced
 import json
 import os
-import pdb
-import pandas as pd
 
 class ListManager:
+# Rows of the list display are in reverse time order: row 0 is the latest event.
 
 	def __init__(self):
 
-		self.event_list = list()
+		self.events = EventIndex()
+		# Per class/team index for the filter bar
+		self.filter_index = FilterIndex(self.events)
+		# Undo/redo of add_event, delete_event and edit_event
+		self.history = EditHistory()
+		# Edits not yet appended to the journal
+		self.pending_records = list()
+		# Views notified around every change, see notify()
+		self.listeners = list()
+		# Records in the journal on disk, the csv is compacted past the threshold
+		self.journal_length = 0
+		self.compact_threshold = 2000
+		# Optional LabelWriter, files are written synchronously without one
+		self.writer = None
+		# Optional SqliteStore replacing the journal, the csv is then only an export
+		self.store = None
 
+	@property
+	def event_list(self):
+
+		return [self.events[index] for index in reversed(range(len(self.events)))]
+
+	def add_listener(self, listener):
+
+		self.listeners.append(listener)
+
+	def notify(self, name, *args):
+		# Listeners implement begin_reset/end_reset, begin_insert/end_insert(row)
+		# and begin_remove/end_remove(row)
+		for listener in self.listeners:
+			getattr(listener, name)(*args)
+
+	@traced
 	def create_list_from_csv(self, path):
 
-		self.event_list.clear()
-		self.event_list = self.read_csv(path)
-		if self.event_list != []:
-			self.sort_list()
+		if self.writer is not None:
+			self.writer.flush()
+		# Read before the reset, so a file that cannot be read (ValueError) leaves the list as it was
+		from_store = self.store is not None and self.store.has_match(path)
+		table = self.store.read_table(path) if from_store else self.read_csv(path)
+		self.notify("begin_reset")
+		self.pending_records.clear()
+		self.filter_index.reset()
+		self.history.clear()
+		self.events.load_table(table)
+		if from_store:
+			self.journal_length = 0
+		else:
+			self.replay_journal(path)
+			if self.store is not None:
+				# First time this file is opened with the database, or it was changed outside of it
+				print(f"Importing {path} into the label database")
+				self.store.import_dataframe(path, index_to_dataframe(self.events))
+		self.notify("end_reset")
 
 	def create_text_list(self):
 
@@ -25,71 +77,200 @@ class ListManager:
 
 		return list_text
 
-	def delete_event(self, index):
+	def event_at(self, row):
+
+		return self.events[len(self.events) - 1 - row]
+
+	def row_of(self, event_id):
+
+		return len(self.events) - 1 - self.events.index_of(event_id)
+
+	def events_between(self, start_ms, end_ms):
 
-		self.event_list.pop(index)
-		self.sort_list()
+		return self.events.between(start_ms, end_ms)
+
+	def row_for_new(self, event, event_id=None):
+
+		return len(self.events) - self.events.insert_index(event, event_id)
+
+	def filter_keys(self, event_filter):
+
+		return self.filter_index.lookup(event_filter)
+
+	def delete_event(self, event_id):
+
+		event = self.remove_event(event_id)
+		self.history.record("delete", event, None)
+		return event
 
 	def add_event(self, event):
 
-		self.event_list.append(event)
-		self.sort_list()
+		event_id = self.insert_event(event)
+		self.history.record("add", None, event)
+		return event_id
 
-	def sort_list(self):
+	def edit_event(self, event_id, event):
+		# Replace an event by an edited copy, one undo step
+		previous = self.remove_event(event_id)
+		self.insert_event(event)
+		self.history.record("edit", previous, event)
+		return event.event_id
 
-		position_list = list()
-		for event in self.event_list:
-			position = event.position
-			position_list.append(position)
+	def undo(self):
+		# Returns False when there is nothing to undo
+		if not self.history.can_undo():
+			return False
+		op, removed, added = self.history.pop_undo()
+		self.swap_events(added, removed)
+		return True
+
+	def redo(self):
+
+		if not self.history.can_redo():
+			return False
+		op, removed, added = self.history.pop_redo()
+		self.swap_events(removed, added)
+		return True
 
-		self.event_list = [x for _,x in sorted(zip(position_list,self.event_list))]
+	def swap_events(self, old, new):
 
-		self.event_list.reverse()
+		if old is not None:
+			self.remove_event(old.event_id)
+		if new is not None:
+			# Back under its former event_id, so it also keeps its place among same-time events
+			self.insert_event(new, new.event_id)
+
+	# remove_event and insert_event are the edits themselves, without history
+
+	def remove_event(self, event_id):
+
+		row = self.row_of(event_id)
+		self.notify("begin_remove", row)
+		event = self.events.remove(event_id)
+		self.filter_index.remove(event)
+		self.pending_records.append(event_to_record("delete", event))
+		self.notify("end_remove", row)
+		return event
+
+	def insert_event(self, event, event_id=None):
+
+		row = self.row_for_new(event, event_id)
+		self.notify("begin_insert", row)
+		event_id = self.events.insert(event, event_id)
+		self.filter_index.add(event)
+		self.pending_records.append(event_to_record("add", event))
+		self.notify("end_insert", row)
+		return event_id
+
+	def sort_list(self):
+		# Edits keep the index sorted, this is only a safety re-sort; rows move, so views are reset
+		keys = sorted(self.events.keys)
+		if keys == self.events.keys:
+			return
+		self.notify("begin_reset")
+		self.events.keys = keys
+		self.filter_index.reset()
+		self.notify("end_reset")
 
 	def read_csv(self, path):
-		
-		event_list = list()
-		data = pd.read_csv(path)
-		for i in range(len(data)):
-			event_i = data.iloc[i]
-			tmp_team = event_i["team"]
-			tmp_label = event_i["event"]
-			tmp_minute = event_i["minute"]
-			tmp_second = event_i["second"]
-			tmp_x_coord = event_i["x"]
-			tmp_y_coord = event_i["y"]
-			tmp_position = event_i["video_ms"]	
-			tmp_frame = event_i["frame"]
-			# print(tmp_team, tmp_label, tmp_minute, tmp_second, tmp_x_coord, tmp_y_coord, tmp_position)
-			event_list.append(Event(tmp_frame, tmp_team, tmp_label, tmp_minute, tmp_second, tmp_x_coord, tmp_y_coord, tmp_position))
-		return event_list
+		# Parquet and Arrow label files are opened like a csv, see utils/columnar.py.
+		# Read into memory: a compaction replaces the file, which a memory map would keep open
+		if is_columnar(path):
+			return read_columnar(path, memory_map=False)
+		return read_event_table(path)
+
+	def replay_journal(self, path):
 
+		journal = AnnotationJournal(journal_path(path))
+		records = journal.replay()
+		if records and records[0]["op"] == "base":
+			base = records.pop(0)
+			if not matches_base(base, path):
+				# Left over by a compaction interrupted after the csv was written (its edits are in the csv),
+				# or the csv was edited elsewhere; kept for a manual look either way
+				stale_path = journal.set_aside()
+				print(f"Not replaying {journal.path}, it was started on another version of the label file. Moved to {stale_path}")
+				records = list()
+		self.journal_length = len(records)
+		for record in records:
+			if record["op"] == "add":
+				self.events.insert(record_to_event(record))
+			elif record["op"] == "delete":
+				deleted = record_to_event(record)
+				key = event_key(deleted)
+				for event in self.events.between(deleted.position, deleted.position):
+					if event_key(event) == key:
+						self.events.remove(event.event_id)
+						break
+
+	@traced
 	def save_file(self, path, half):
-		if self.event_list:
-			annotations = []
-			for event in self.event_list:
-				annotations.append([
-					event.frame,
-					event.team,
-					event.event,
-					event.minute,
-					event.second,
-					event.x_coord,
-					event.y_coord,
-					event.position,
-				])
-
-			df = pd.DataFrame(
-				annotations,
-				columns=['frame', 'team', 'event', 'minute', 'second', 'x', 'y', 'video_ms']
-			)
+		# Append the pending edits to the journal (or the database),
+		# the csv is only rewritten on compaction
+		if not path:
+			return
+		if self.store is None and self.journal_length + len(self.pending_records) > self.compact_threshold:
+			self.compact_file(path, half)
+			return
+		records = self.pending_records
+		self.pending_records = list()
+		self.journal_length += len(records)
+		if self.writer is not None:
+			self.writer.append(path, records, self.append_records)
 		else:
-			df = pd.DataFrame(
-				columns=['frame', 'team', 'event', 'minute', 'second', 'x', 'y', 'video_ms']
-			)
-		df['frame'] = df['frame'].astype(int)
-		df = df.sort_values(by=['frame'])
-		df['frame'] = df['frame'].astype(str)
-		df.to_csv(path, index=False)
-
-		
+			self.append_records(path, records)
+
+	@traced
+	def compact_file(self, path, half):
+		# Rewrite the canonical csv from memory and drop the journal.
+		# The pending edits are handed over first: the database is not rewritten by a compaction,
+		# and journal appends, which the compaction replaces, are still written if it fails.
+		if not path:
+			return
+		records = self.pending_records
+		self.pending_records = list()
+		self.journal_length = 0
+		df = index_to_dataframe(self.events)
+		if self.writer is not None:
+			self.writer.append(path, records, self.append_records)
+			# Database edits still queued are not in the snapshot, they must be written before it
+			self.writer.compact(path, df, self.write_compaction, supersede=self.store is None)
+			return
+		if self.store is not None:
+			self.append_records(path, records)
+		try:
+			self.write_compaction(path, df)
+		except Exception:
+			if self.store is None:
+				self.append_records(path, records)
+			raise
+
+	# append_records and write_compaction run on the writer thread when there is one
+
+	@traced
+	def append_records(self, path, records):
+
+		if self.store is not None:
+			self.store.apply(path, records)
+		else:
+			AnnotationJournal(journal_path(path)).append(records, label_path=path)
+
+	@traced
+	def write_compaction(self, path, df):
+
+		if is_columnar(path):
+			write_columnar(path, df)
+		else:
+			write_label_csv(path, df)
+		AnnotationJournal(journal_path(path)).clear()
+		if self.store is not None:
+			# The file now matches the database, it is not imported again on the next open
+			self.store.record_export(path)
+
+	def write_csv(self, path):
+		write_label_csv(path, index_to_dataframe(self.events))
+
+	@traced
+	def export_columnar(self, path):
+		# Snapshot of the annotations as .parquet or .arrow, the label csv and its journal are untouched
+		write_columnar(path, index_to_dataframe(self.events))
@@ -0,0 +1,15 @@
+import os
+
+# Names of the files the tool works with, shared by the GUI, the project catalog and the batch CLI.
+# Kept free of heavy imports so any of them can use it.
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv", ".mts", ".m4v", ".mpg", ".mpeg", ".wmv", ".webm")
+
+def label_path_for(video_path):
+	# Label csv the GUI creates for a video
+	return os.path.join(os.path.dirname(video_path), os.path.basename(video_path).split('.')[0] + '.csv')
+
+def is_video(name):
+	# Proxies made by the tool are not videos of their own, see utils/proxy_video.py
+	lower = name.lower()
+	return lower.endswith(VIDEO_EXTENSIONS) and not lower.endswith(".proxy.avi")
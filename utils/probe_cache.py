@@ -0,0 +1,113 @@
+import os
+import sqlite3
+from utils.lazy_import import lazy_import
+cv2 = lazy_import("cv2")
+
+# Video metadata read with OpenCV, cached in a small sqlite database keyed by path.
+# An entry is only used while the file size and mtime still match.
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "ste_label_tool", "video_probe.sqlite3")
+
+PROBE_FIELDS = ["width", "height", "fps", "duration_ms", "frame_count", "codec"]
+
+def probe_video(path):
+	# Returns a dict with PROBE_FIELDS, invalid values are None
+	capture = cv2.VideoCapture(path)
+	if not capture.isOpened():
+		capture.release()
+		return None
+
+	width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+	height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+	fps = capture.get(cv2.CAP_PROP_FPS)
+	frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+	fourcc = int(capture.get(cv2.CAP_PROP_FOURCC))
+	capture.release()
+
+	if width <= 0 or height <= 0:
+		width, height = None, None
+
+	# Some files return 0.0 or NaN fps
+	try:
+		fps = float(fps)
+	except Exception:
+		fps = None
+	if fps is None or fps <= 1.0 or fps != fps:
+		fps = None
+
+	if frame_count <= 0:
+		frame_count = None
+
+	duration_ms = frame_count * 1000.0 / fps if frame_count and fps else None
+	codec = "".join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4)).strip("\x00 ") or None
+
+	return {
+		"width": width,
+		"height": height,
+		"fps": fps,
+		"duration_ms": duration_ms,
+		"frame_count": frame_count,
+		"codec": codec,
+	}
+
+class ProbeCache:
+
+	def __init__(self, path=DEFAULT_CACHE_PATH):
+
+		self.path = path
+
+	def connect(self):
+
+		os.makedirs(os.path.dirname(self.path), exist_ok=True)
+		connection = sqlite3.connect(self.path, timeout=5.0)
+		connection.execute(
+			"CREATE TABLE IF NOT EXISTS probe ("
+			"path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, "
+			"width INTEGER, height INTEGER, fps REAL, duration_ms REAL, frame_count INTEGER, codec TEXT)"
+		)
+		return connection
+
+	def get(self, video_path):
+
+		video_path = os.path.abspath(video_path)
+		try:
+			stat = os.stat(video_path)
+			connection = self.connect()
+			try:
+				row = connection.execute(
+					"SELECT " + ", ".join(PROBE_FIELDS) + " FROM probe WHERE path = ? AND size = ? AND mtime_ns = ?",
+					(video_path, stat.st_size, stat.st_mtime_ns)
+				).fetchone()
+			finally:
+				connection.close()
+		except (OSError, sqlite3.Error):
+			return None
+		if row is None:
+			return None
+		return dict(zip(PROBE_FIELDS, row))
+
+	def put(self, video_path, info):
+
+		video_path = os.path.abspath(video_path)
+		try:
+			stat = os.stat(video_path)
+			connection = self.connect()
+			try:
+				with connection:
+					connection.execute(
+						"INSERT OR REPLACE INTO probe (path, size, mtime_ns, " + ", ".join(PROBE_FIELDS) + ") VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+						(video_path, stat.st_size, stat.st_mtime_ns) + tuple(info[field] for field in PROBE_FIELDS)
+					)
+			finally:
+				connection.close()
+		except (OSError, sqlite3.Error) as error:
+			print(f"Could not cache video probe: {error}")
+
+	def probe(self, video_path):
+		# Cached metadata, probing with OpenCV only for new or changed files
+		info = self.get(video_path)
+		if info is None:
+			info = probe_video(video_path)
+			if info is not None:
+				self.put(video_path, info)
+		return info
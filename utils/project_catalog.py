@@ -0,0 +1,186 @@
+import os
+import sqlite3
+from utils.list_management import ListManager
+from utils.media_paths import is_video, label_path_for
+from utils.probe_cache import PROBE_FIELDS, probe_video
+from utils.journal import journal_path
+from utils.lazy_import import lazy_import
+pd = lazy_import("pandas")
+
+# Catalog of every video under a project directory with its probe metadata and label file,
+# kept in a sqlite database in the project directory (in the user cache if it is read-only).
+# Rescans only stat the files: a video is probed again when its size or mtime changed,
+# and a label file is read again when it, or its journal, changed. Matches kept in the
+# label database (STE_LABEL_DB) are counted from it on every scan instead.
+
+CATALOG_NAME = ".ste_catalog.sqlite3"
+CACHE_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "ste_label_tool", "catalogs")
+
+LABEL_FIELDS = ["label_mtime_ns", "label_size", "journal_mtime_ns", "journal_size", "events", "last_event_ms"]
+FIELDS = ["path", "size", "mtime_ns"] + PROBE_FIELDS + LABEL_FIELDS
+
+SCHEMA = "CREATE TABLE IF NOT EXISTS videos (" \
+	"path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, " \
+	"width INTEGER, height INTEGER, fps REAL, duration_ms REAL, frame_count INTEGER, codec TEXT, " \
+	"label_mtime_ns INTEGER, label_size INTEGER, journal_mtime_ns INTEGER, journal_size INTEGER, " \
+	"events INTEGER, last_event_ms INTEGER)"
+
+def catalog_path(root):
+
+	root = os.path.abspath(root)
+	if os.access(root, os.W_OK):
+		return os.path.join(root, CATALOG_NAME)
+	name = root.strip(os.sep).replace(os.sep, "_") or "root"
+	return os.path.join(CACHE_DIRECTORY, name + ".sqlite3")
+
+def _stat(path):
+	# (mtime_ns, size), or (None, None) for a missing file
+	try:
+		stat = os.stat(path)
+	except OSError:
+		return None, None
+	return stat.st_mtime_ns, stat.st_size
+
+def count_events(label_path, store=None):
+	# (number of events, video_ms of the latest event) of a label file, raises when it is unreadable.
+	# store: the SqliteStore holding the match, when the GUI keeps its annotations there
+	if store is not None:
+		return store.summary(label_path)
+	if not os.path.isfile(label_path):
+		return 0, None
+	if os.path.isfile(journal_path(label_path)) and os.path.getsize(journal_path(label_path)) > 0:
+		# Pending edits, count what the GUI would show
+		manager = ListManager()
+		manager.create_list_from_csv(label_path)
+		if not len(manager.events):
+			return 0, None
+		return len(manager.events), manager.events[len(manager.events) - 1].position
+	video_ms = pd.read_csv(label_path, usecols=["video_ms"])["video_ms"]
+	if not len(video_ms):
+		return 0, None
+	return len(video_ms), int(video_ms.max())
+
+class ProjectCatalog:
+
+	def __init__(self, root, path=None, store=None):
+
+		self.root = os.path.abspath(root)
+		self.path = path or catalog_path(self.root)
+		# Optional SqliteStore of the GUI, the matches it holds are counted from it
+		self.store = store
+
+	def connect(self):
+
+		os.makedirs(os.path.dirname(self.path), exist_ok=True)
+		connection = sqlite3.connect(self.path, timeout=10.0)
+		# Readers (the browser) are not blocked while a scan writes
+		connection.execute("PRAGMA journal_mode=WAL")
+		connection.execute(SCHEMA)
+		return connection
+
+	def rows(self):
+		# Catalog entries as dicts sorted by path, with absolute video and label paths
+		connection = self.connect()
+		try:
+			rows = connection.execute("SELECT " + ", ".join(FIELDS) + " FROM videos ORDER BY path").fetchall()
+		finally:
+			connection.close()
+		entries = list()
+		for row in rows:
+			entry = dict(zip(FIELDS, row))
+			entry["video"] = os.path.join(self.root, entry["path"])
+			entry["label"] = label_path_for(entry["video"])
+			entries.append(entry)
+		return entries
+
+	def scan(self, stop=None, progress=None, batch_size=100):
+		# Incremental rescan of the project directory; progress(videos seen) is called per batch.
+		# Returns counts of videos seen, probed, labels read and entries removed, with the label files
+		# that could not be read as "label: error" in errors, or None when stopped.
+		connection = self.connect()
+		try:
+			known = {row[0]: row for row in connection.execute("SELECT path, size, mtime_ns, " + ", ".join(LABEL_FIELDS) + " FROM videos")}
+			seen = set()
+			updates = list()
+			counts = {"videos": 0, "probed": 0, "labels_read": 0, "removed": 0, "errors": []}
+			for directory, directories, names in os.walk(self.root):
+				# Hidden directories (.git, caches) are not part of the project
+				directories[:] = sorted(name for name in directories if not name.startswith("."))
+				for name in sorted(names):
+					if stop is not None and stop.is_set():
+						return None
+					if not is_video(name):
+						continue
+					video = os.path.join(directory, name)
+					relative = os.path.relpath(video, self.root)
+					mtime_ns, size = _stat(video)
+					if mtime_ns is None:
+						continue
+					seen.add(relative)
+					counts["videos"] += 1
+					update = self.scan_video(connection, video, relative, size, mtime_ns, known.get(relative), counts)
+					if update is not None:
+						updates.append(update)
+					if len(updates) >= batch_size:
+						self.write(connection, updates)
+						updates = list()
+						if progress is not None:
+							progress(counts["videos"])
+
+			self.write(connection, updates)
+			removed = [path for path in known if path not in seen]
+			with connection:
+				connection.executemany("DELETE FROM videos WHERE path = ?", [(path,) for path in removed])
+			counts["removed"] = len(removed)
+		finally:
+			connection.close()
+		if progress is not None:
+			progress(counts["videos"])
+		return counts
+
+	def scan_video(self, connection, video, relative, size, mtime_ns, known, counts):
+		# Row to write for one video, None when neither the video nor its label changed
+		label = label_path_for(video)
+		label_state = _stat(label) + _stat(journal_path(label))
+		video_changed = known is None or known[1:3] != (size, mtime_ns)
+		label_changed = known is None or known[3:7] != label_state
+		# Edits kept in the label database leave the label file untouched, those matches are counted every scan
+		stored = self.store is not None and self.store.has_match(label)
+		if not video_changed and not label_changed and not stored:
+			return None
+
+		if label_changed or stored:
+			try:
+				events, last_event_ms = count_events(label, self.store if stored else None)
+			except Exception as error:
+				counts["errors"].append(f"{os.path.relpath(label, self.root)}: {error}")
+				events, last_event_ms = None, None
+			if not video_changed and not label_changed and (events, last_event_ms) == known[7:9]:
+				return None
+			counts["labels_read"] += 1
+		else:
+			events, last_event_ms = known[7:9]
+
+		if video_changed:
+			info = probe_video(video) or dict.fromkeys(PROBE_FIELDS)
+			counts["probed"] += 1
+		else:
+			row = connection.execute("SELECT " + ", ".join(PROBE_FIELDS) + " FROM videos WHERE path = ?", (relative,)).fetchone()
+			info = dict(zip(PROBE_FIELDS, row))
+		return (relative, size, mtime_ns) + tuple(info[field] for field in PROBE_FIELDS) + label_state + (events, last_event_ms)
+
+	def write(self, connection, updates):
+
+		if not updates:
+			return
+		with connection:
+			connection.executemany(
+				"INSERT OR REPLACE INTO videos (" + ", ".join(FIELDS) + ") VALUES (" + ", ".join("?" * len(FIELDS)) + ")",
+				updates
+			)
+
+def annotation_progress(entry):
+	# Share of the video up to the latest event, None without a duration or events
+	if not entry["events"] or not entry["duration_ms"] or entry["last_event_ms"] is None:
+		return None
+	return min(1.0, entry["last_event_ms"] / entry["duration_ms"])
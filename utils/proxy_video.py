@@ -0,0 +1,126 @@
+import json
+import os
+from utils.lazy_import import lazy_import
+from utils.frame_timestamps import save_timestamps
+np = lazy_import("numpy")
+cv2 = lazy_import("cv2")
+
+# Low-resolution proxy of a video for playback, cached next to it as <video>.proxy.avi.
+# Motion JPEG: every frame is a keyframe, so seeking and stepping never decode a whole GOP.
+# The proxy has exactly the frames of the source at the source frame rate, and is only
+# used when the source frames are evenly spaced: a position then shows the same frame
+# in the proxy as in the source, and all ms <-> frame conversions stay those of the source.
+# Annotations stay in source pixels, only the display is scaled.
+
+PROXY_HEIGHT = 360
+PROXY_QUALITY = 75
+
+def proxy_path(path):
+	return path + ".proxy.avi"
+
+def proxy_info_path(path):
+	return path + ".proxy.json"
+
+def proxy_size(width, height, max_height=PROXY_HEIGHT):
+	# Same aspect ratio, even dimensions
+	if height > max_height:
+		width, height = width * max_height / height, max_height
+	return max(2, int(round(width / 2)) * 2), max(2, int(round(height / 2)) * 2)
+
+def is_constant_rate(pts, fps, tolerance_ms=1.0):
+	expected = np.arange(len(pts)) * 1000.0 / fps
+	return bool(np.all(np.abs(np.asarray(pts) - expected) <= tolerance_ms))
+
+def read_proxy_info(path):
+
+	try:
+		with open(proxy_info_path(path)) as file:
+			info = json.load(file)
+		stat = os.stat(path)
+	except (OSError, ValueError):
+		return None
+	if info.get("size") != stat.st_size or info.get("mtime_ns") != stat.st_mtime_ns:
+		return None
+	return info
+
+def load_proxy(path):
+	# Path of the up to date proxy of the video, or None
+	info = read_proxy_info(path)
+	if info is None or not info.get("constant_rate") or not os.path.isfile(proxy_path(path)):
+		return None
+	return proxy_path(path)
+
+def proxy_unusable(path):
+	# True when the video was already found to have unevenly spaced frames
+	info = read_proxy_info(path)
+	return info is not None and not info.get("constant_rate")
+
+def write_proxy_info(path, info):
+
+	stat = os.stat(path)
+	info = dict(info, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+	with open(proxy_info_path(path), 'w') as file:
+		json.dump(info, file)
+
+def make_proxy(path, stop=None, progress=None, max_height=PROXY_HEIGHT):
+	# Transcodes the video, returns (proxy path or None, frame timestamps or None).
+	# progress(fraction) is called about every percent; the frame timestamps read
+	# on the way are also saved as the timestamp sidecar.
+	capture = cv2.VideoCapture(path)
+	if not capture.isOpened():
+		capture.release()
+		return None, None
+	fps = capture.get(cv2.CAP_PROP_FPS)
+	total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+	if not fps or fps != fps or fps <= 1.0:
+		capture.release()
+		return None, None
+
+	# The writer picks its container from the extension
+	temporary = proxy_path(path) + ".tmp.avi"
+	writer = None
+	size = None
+	pts = list()
+	step = max(1, total // 100)
+	completed = False
+	try:
+		while True:
+			if stop is not None and stop.is_set():
+				return None, None
+			ok, frame = capture.read()
+			if not ok:
+				break
+			pts.append(capture.get(cv2.CAP_PROP_POS_MSEC))
+			if writer is None:
+				size = proxy_size(frame.shape[1], frame.shape[0], max_height)
+				writer = cv2.VideoWriter(temporary, cv2.VideoWriter_fourcc(*"MJPG"), fps, size)
+				if not writer.isOpened():
+					return None, None
+				writer.set(cv2.VIDEOWRITER_PROP_QUALITY, PROXY_QUALITY)
+			writer.write(cv2.resize(frame, size, interpolation=cv2.INTER_AREA))
+			if progress is not None and total > 0 and len(pts) % step == 0:
+				progress(min(1.0, len(pts) / total))
+		completed = writer is not None
+	finally:
+		capture.release()
+		if writer is not None:
+			writer.release()
+		if not completed and os.path.isfile(temporary):
+			os.remove(temporary)
+
+	if not completed:
+		return None, None
+	pts = np.maximum.accumulate(np.asarray(pts, dtype=np.float64))
+	save_timestamps(path, pts)
+	constant_rate = is_constant_rate(pts, fps)
+	info = {"fps": fps, "frames": len(pts), "width": size[0], "height": size[1], "constant_rate": constant_rate}
+	try:
+		if constant_rate:
+			os.replace(temporary, proxy_path(path))
+		else:
+			os.remove(temporary)
+		write_proxy_info(path, info)
+	except OSError as error:
+		print(f"Could not write the proxy video: {error}")
+		return None, pts
+	return (proxy_path(path) if constant_rate else None), pts
@@ -0,0 +1,180 @@
+from utils.event_table import COLUMNS, dataframe_to_table
+import os
+import sqlite3
+import threading
+from utils.lazy_import import lazy_import
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# Optional sqlite storage for annotations, an alternative to the label csv and its journal.
+# One database can hold many matches, each keyed by the path of its label csv.
+# Edits are single-row inserts and deletes in their own transaction.
+# The size and mtime of the label csv are kept when it is imported or exported, so a csv
+# changed by another tool (the batch CLI, an editor) is imported again instead of ignored.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+	match TEXT NOT NULL,
+	frame INTEGER,
+	team TEXT,
+	event TEXT,
+	minute INTEGER,
+	second REAL,
+	x INTEGER,
+	y INTEGER,
+	video_ms INTEGER
+);
+CREATE TABLE IF NOT EXISTS matches (
+	match TEXT PRIMARY KEY
+);
+CREATE INDEX IF NOT EXISTS events_video_ms ON events (match, video_ms);
+CREATE INDEX IF NOT EXISTS events_frame ON events (match, frame);
+CREATE INDEX IF NOT EXISTS events_event ON events (event, team, video_ms);
+CREATE INDEX IF NOT EXISTS events_team ON events (team, video_ms);
+"""
+
+# PRAGMA user_version of a database with every step of migrate() applied
+SCHEMA_VERSION = 2
+
+def match_key(path):
+	return os.path.abspath(path)
+
+def file_state(path):
+	# (size, mtime_ns) of the label file, (None, None) when missing
+	try:
+		stat = os.stat(path)
+	except OSError:
+		return None, None
+	return stat.st_size, stat.st_mtime_ns
+
+class SqliteStore:
+
+	def __init__(self, path):
+
+		self.path = path
+		self.lock = threading.Lock()
+		# Used from the GUI thread and the label writer thread, serialized by the lock
+		self.connection = sqlite3.connect(path, timeout=10.0, check_same_thread=False)
+		self.connection.execute("PRAGMA journal_mode=WAL")
+		self.connection.executescript(SCHEMA)
+		self.migrate()
+
+	def migrate(self):
+		# Brings databases of earlier versions up to SCHEMA_VERSION, new ones go through it too
+		version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+		if version >= SCHEMA_VERSION:
+			return
+		with self.lock, self.connection:
+			if version < 1:
+				# Missing values were stored as NULL, stored now like the events hold them
+				self.connection.execute("UPDATE events SET x = -1 WHERE x IS NULL")
+				self.connection.execute("UPDATE events SET y = -1 WHERE y IS NULL")
+				self.connection.execute("UPDATE events SET team = '' WHERE team IS NULL")
+				self.connection.execute("UPDATE events SET event = '' WHERE event IS NULL")
+			if version < 2:
+				# Left NULL for stored matches until they are opened, see has_match()
+				self.connection.execute("ALTER TABLE matches ADD COLUMN size INTEGER")
+				self.connection.execute("ALTER TABLE matches ADD COLUMN mtime_ns INTEGER")
+			self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+	def close(self):
+
+		with self.lock:
+			self.connection.close()
+
+	def has_match(self, path):
+		# Whether the match is stored and its label file is as it was imported or last exported
+		with self.lock:
+			row = self.connection.execute("SELECT size, mtime_ns FROM matches WHERE match = ?", (match_key(path),)).fetchone()
+		if row is None:
+			return False
+		if row == (None, None):
+			# Stored before the file state was kept, the database is taken as current
+			self.record_export(path)
+			return True
+		return row == file_state(path)
+
+	def read_table(self, path):
+
+		with self.lock:
+			data = pd.read_sql_query(
+				"SELECT " + ", ".join(COLUMNS) + " FROM events WHERE match = ? ORDER BY video_ms",
+				self.connection,
+				params=(match_key(path),)
+			)
+		return dataframe_to_table(data)
+
+	def import_dataframe(self, path, df):
+		# Replace everything stored for the match with the rows of df.
+		# Missing coordinates and names are stored as the events hold them (-1 and ""), so deletes find them.
+		df = df.assign(
+			team=df["team"].astype(object).fillna(""),
+			event=df["event"].astype(object).fillna(""),
+			x=df["x"].astype(np.float64).fillna(-1).astype(np.int64),
+			y=df["y"].astype(np.float64).fillna(-1).astype(np.int64),
+		)
+		rows = list(zip(*(df[column].tolist() for column in COLUMNS)))
+		match = match_key(path)
+		with self.lock, self.connection:
+			self.connection.execute("DELETE FROM events WHERE match = ?", (match,))
+			self.connection.executemany(
+				"INSERT INTO events (match, " + ", ".join(COLUMNS) + ") VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+				[(match,) + row for row in rows]
+			)
+			self.connection.execute("INSERT OR REPLACE INTO matches (match, size, mtime_ns) VALUES (?, ?, ?)", (match,) + file_state(path))
+
+	def record_export(self, path):
+		# After the label file was written from the stored events, so it is not imported again
+		with self.lock, self.connection:
+			self.connection.execute("UPDATE matches SET size = ?, mtime_ns = ? WHERE match = ?", file_state(path) + (match_key(path),))
+
+	def apply(self, path, records):
+		# Journal records ({"op": "add" | "delete", <csv columns>}) applied in one transaction
+		match = match_key(path)
+		with self.lock, self.connection:
+			for record in records:
+				values = (match,) + tuple(record[column] for column in COLUMNS)
+				if record["op"] == "add":
+					self.connection.execute(
+						"INSERT INTO events (match, " + ", ".join(COLUMNS) + ") VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+						values
+					)
+				elif record["op"] == "delete":
+					self.connection.execute(
+						"DELETE FROM events WHERE rowid = ("
+						"SELECT rowid FROM events WHERE match = ? AND video_ms = ? AND frame = ? "
+						"AND team IS ? AND event IS ? AND x IS ? AND y IS ? LIMIT 1)",
+						(match, record["video_ms"], record["frame"], record["team"], record["event"], record["x"], record["y"])
+					)
+
+	def summary(self, path):
+		# (number of events, video_ms of the latest event) of a stored match
+		with self.lock:
+			count, last_ms = self.connection.execute(
+				"SELECT COUNT(*), MAX(video_ms) FROM events WHERE match = ?", (match_key(path),)
+			).fetchone()
+		return count, last_ms
+
+	def query(self, event=None, team=None, start_ms=None, end_ms=None, match=None):
+		# e.g. query(event="shot_success", team="home", start_ms=45*60*1000) over every stored match
+		conditions = list()
+		params = list()
+		for column, value in (("event", event), ("team", team)):
+			if value is not None:
+				conditions.append(f"{column} = ?")
+				params.append(value)
+		if match is not None:
+			conditions.append("match = ?")
+			params.append(match_key(match))
+		if start_ms is not None:
+			conditions.append("video_ms >= ?")
+			params.append(int(start_ms))
+		if end_ms is not None:
+			conditions.append("video_ms <= ?")
+			params.append(int(end_ms))
+		sql = "SELECT match, " + ", ".join(COLUMNS) + " FROM events"
+		if conditions:
+			sql += " WHERE " + " AND ".join(conditions)
+		sql += " ORDER BY match, video_ms"
+		with self.lock:
+			return pd.read_sql_query(sql, self.connection, params=params)
@@ -0,0 +1,57 @@
+from contextlib import contextmanager
+import os
+import sys
+import time
+
+# Opt-in report of where start-up time goes, enabled with --startup-timing on the
+# command line or STE_STARTUP_TIMING=1. Sections are printed to stderr at the first paint
+# of the main window; those finishing later (lazy imports on first video open, ...)
+# are printed as they happen.
+
+class StartupTimer:
+
+	def __init__(self):
+
+		self.enabled = "--startup-timing" in sys.argv or os.environ.get("STE_STARTUP_TIMING") == "1"
+		self.start = time.perf_counter()
+		self.entries = list()
+		self.reported = False
+
+	@contextmanager
+	def section(self, label):
+
+		if not self.enabled:
+			yield
+			return
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.record(label, time.perf_counter() - start)
+
+	def record(self, label, seconds):
+
+		if not self.enabled:
+			return
+		entry = (label, seconds, time.perf_counter() - self.start)
+		if self.reported:
+			self.print_entry(entry)
+		else:
+			self.entries.append(entry)
+
+	def report(self, label="first paint"):
+		# Print the sections so far and the time from start to now
+		if not self.enabled or self.reported:
+			return
+		self.reported = True
+		print("startup timing (ms):       section    since start", file=sys.stderr)
+		for entry in self.entries:
+			self.print_entry(entry)
+		print(f"  {label:<30}{'':>10} {(time.perf_counter() - self.start) * 1000:>10.1f}", file=sys.stderr)
+
+	def print_entry(self, entry):
+
+		label, seconds, elapsed = entry
+		print(f"  {label:<30}{seconds * 1000:>10.1f} {elapsed * 1000:>10.1f}", file=sys.stderr)
+
+startup_timer = StartupTimer()
@@ -0,0 +1,160 @@
+from collections import deque
+import atexit
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+# Opt-in tracing of the hot paths, written as a Chrome trace (chrome://tracing or ui.perfetto.dev).
+# Enabled with --trace[=path] on the command line or STE_TRACE=path (STE_TRACE=1 for the default path).
+# Each traced call is a complete event with its wall time and in args:
+#     cpu_ms: CPU time of the calling thread, wall minus cpu is time spent waiting
+#     gui_blocked_ms: wall time when called on the GUI thread, outermost traced call only
+#     alloc_kb: change of the memory traced by tracemalloc (all threads) over the call
+# Without tracing, traced() returns the function unchanged.
+
+DEFAULT_TRACE_PATH = "ste_trace.json"
+
+def trace_path_from(argv, environ):
+
+	for argument in argv:
+		if argument == "--trace":
+			return DEFAULT_TRACE_PATH
+		if argument.startswith("--trace="):
+			return argument.split("=", 1)[1] or DEFAULT_TRACE_PATH
+	value = environ.get("STE_TRACE")
+	if value:
+		return DEFAULT_TRACE_PATH if value == "1" else value
+	return None
+
+class Tracer:
+# Keeps the most recent events only, so a long session stays bounded in memory
+
+	def __init__(self, path, max_events=500000):
+
+		self.path = path
+		self.events = deque(maxlen=max_events)
+		self.lock = threading.Lock()
+		self.local = threading.local()
+		self.thread_names = dict()
+		self.start = time.perf_counter()
+		self.pid = os.getpid()
+
+	@property
+	def enabled(self):
+
+		return self.path is not None
+
+	def begin(self):
+
+		if not tracemalloc.is_tracing():
+			tracemalloc.start()
+		atexit.register(self.write)
+		print(f"Tracing to {os.path.abspath(self.path)}")
+
+	def call(self, name, function, args, kwargs):
+
+		with Span(self, name):
+			return function(*args, **kwargs)
+
+	def add(self, event, thread):
+
+		with self.lock:
+			self.thread_names[thread.ident] = thread.name
+			self.events.append(event)
+
+	def counter(self, name, values):
+		# Counter track in the trace, e.g. latency percentiles
+		thread = threading.current_thread()
+		self.add({
+			"name": name,
+			"ph": "C",
+			"ts": (time.perf_counter() - self.start) * 1e6,
+			"pid": self.pid,
+			"tid": thread.ident,
+			"args": values,
+		}, thread)
+
+	def write(self):
+
+		with self.lock:
+			events = list(self.events)
+			names = dict(self.thread_names)
+		metadata = [
+			{"name": "thread_name", "ph": "M", "pid": self.pid, "tid": ident, "args": {"name": "GUI" if name == "MainThread" else name}}
+			for ident, name in names.items()
+		]
+		try:
+			with open(self.path, 'w') as file:
+				json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, file)
+		except OSError as error:
+			print(f"Could not write the trace: {error}")
+			return
+		print(f"Trace written to {os.path.abspath(self.path)} ({len(events)} events)")
+
+class Span:
+# One traced call as a Chrome trace complete event
+
+	def __init__(self, tracer, name):
+
+		self.tracer = tracer
+		self.name = name
+
+	def __enter__(self):
+
+		self.thread = threading.current_thread()
+		self.depth = getattr(self.tracer.local, "depth", 0)
+		self.tracer.local.depth = self.depth + 1
+		self.memory = tracemalloc.get_traced_memory()[0]
+		self.cpu = time.thread_time()
+		self.start = time.perf_counter()
+		return self
+
+	def __exit__(self, *exc_info):
+
+		end = time.perf_counter()
+		self.tracer.local.depth = self.depth
+		on_gui_thread = self.thread is threading.main_thread()
+		wall_ms = (end - self.start) * 1000.0
+		self.tracer.add({
+			"name": self.name,
+			"cat": "gui" if on_gui_thread else "worker",
+			"ph": "X",
+			"ts": (self.start - self.tracer.start) * 1e6,
+			"dur": (end - self.start) * 1e6,
+			"pid": self.tracer.pid,
+			"tid": self.thread.ident,
+			"args": {
+				"cpu_ms": round((time.thread_time() - self.cpu) * 1000.0, 3),
+				"gui_blocked_ms": round(wall_ms, 3) if on_gui_thread and self.depth == 0 else 0.0,
+				"alloc_kb": round((tracemalloc.get_traced_memory()[0] - self.memory) / 1024.0, 1),
+			},
+		}, self.thread)
+		return False
+
+tracer = Tracer(trace_path_from(sys.argv, os.environ))
+if tracer.enabled:
+	tracer.begin()
+
+def traced(function=None, name=None):
+	# Decorator, @traced or @traced(name="..."); the name defaults to Class.method
+	if function is None:
+		return lambda function: traced(function, name)
+	if not tracer.enabled:
+		return function
+	label = name or function.__qualname__
+	code = function.__code__
+	# Qt signals pass their arguments to any connected callable and the wrapper takes *args,
+	# so drop the extra ones as Qt would have for the undecorated method
+	limit = None if code.co_flags & inspect.CO_VARARGS else code.co_argcount
+
+	@functools.wraps(function)
+	def wrapper(*args, **kwargs):
+		if limit is not None:
+			args = args[:limit]
+		return tracer.call(label, function, args, kwargs)
+	return wrapper
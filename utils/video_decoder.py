@@ -0,0 +1,114 @@
+from collections import OrderedDict
+import threading
+from utils.lazy_import import lazy_import
+from utils.tracing import traced
+cv2 = lazy_import("cv2")
+
+class VideoDecoder:
+# Long-lived OpenCV capture for one video with an LRU cache of decoded frames keyed by frame index.
+# Frames handed out are shared with the cache and must not be modified in place.
+# Decoding and the cache have separate locks, so peek() never waits for a decode
+# running on a prefetch thread.
+
+	def __init__(self, path, timestamps, cache_bytes=256*1024*1024):
+
+		self.path = path
+		# FrameTimestamps used to map positions to frame indices
+		self.timestamps = timestamps
+		self.cache_bytes = cache_bytes
+		self.cached_bytes = 0
+		self.cache = OrderedDict()
+		self.capture = None
+		# Index of the frame the next read() returns, None when unknown
+		self.next_index = None
+		# Forward gaps up to this many frames are decoded instead of seeking
+		self.max_skip = 15
+		self.frame_bytes = None
+		self.decode_lock = threading.Lock()
+		self.cache_lock = threading.Lock()
+
+	def open(self):
+
+		if self.capture is None:
+			self.capture = cv2.VideoCapture(self.path)
+			self.next_index = 0
+		return self.capture.isOpened()
+
+	def release(self):
+
+		with self.decode_lock:
+			if self.capture is not None:
+				self.capture.release()
+				self.capture = None
+			self.next_index = None
+		with self.cache_lock:
+			self.cache.clear()
+			self.cached_bytes = 0
+
+	def capacity_frames(self, default=16):
+		# How many frames fit in the cache, once the frame size is known
+		if not self.frame_bytes:
+			return default
+		return max(1, self.cache_bytes // self.frame_bytes - 1)
+
+	def frame_index(self, position_ms):
+
+		return self.timestamps.frame_at(position_ms)
+
+	def frame_at_ms(self, position_ms):
+
+		return self.frame_at(self.frame_index(position_ms))
+
+	def peek(self, index):
+		# Cached frame or None, never decodes
+		with self.cache_lock:
+			frame = self.cache.get(index)
+			if frame is not None:
+				self.cache.move_to_end(index)
+			return frame
+
+	def frame_at(self, index):
+
+		frame = self.peek(index)
+		if frame is not None:
+			return frame
+
+		with self.decode_lock:
+			# Another thread may have decoded it while we waited
+			frame = self.peek(index)
+			if frame is None:
+				frame = self.decode(index)
+		return frame
+
+	@traced
+	def decode(self, index):
+
+		if not self.open():
+			return None
+
+		if self.next_index is None or not 0 <= index - self.next_index <= self.max_skip:
+			self.capture.set(cv2.CAP_PROP_POS_FRAMES, index)
+			self.next_index = index
+		while self.next_index < index:
+			if not self.capture.grab():
+				self.next_index = None
+				return None
+			self.next_index += 1
+
+		ok, frame = self.capture.read()
+		if not ok or frame is None:
+			self.next_index = None
+			return None
+		self.next_index = index + 1
+		self.store(index, frame)
+		return frame
+
+	def store(self, index, frame):
+
+		with self.cache_lock:
+			self.frame_bytes = frame.nbytes
+			self.cache[index] = frame
+			self.cached_bytes += frame.nbytes
+			while self.cached_bytes > self.cache_bytes and len(self.cache) > 1:
+				_, evicted = self.cache.popitem(last=False)
+				self.cached_bytes -= evicted.nbytes